@@ -0,0 +1,488 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                       BENCHMARK MODULE                                         |
+    |     Compares the memory use and lookup throughput of the package hash table implementations,   |
+    |   measures the memory taken by each package, and times the whole pipeline on synthetic data.   |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+
+Usage:
+    python benchmark.py                        # 1k, 100k and 1M packages
+    python benchmark.py --sizes 1000 50000     # custom sizes
+    python benchmark.py --strides 1 4096       # custom key spacings
+    python benchmark.py --package-memory       # bytes per package record
+    python benchmark.py --suite --packages 100000 --addresses 2000 --json results.json
+    python benchmark.py --suite --compare results.json               # against an earlier run
+    python benchmark.py --generate /tmp/synthetic --packages 10000   # only write the CSV files
+"""
+
+import argparse
+import csv
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from main import (ChainingHashTable, Dataset, OpenAddressingHashTable, Trucks, addresses, distance_between,
+                  get_dataset, package_from_row, truck_deliver_packages)
+from status import StatusEngine
+
+# The deadlines of the synthetic packages and how often each occurs, roughly as in the bundled package file
+DEADLINE_MIX = (("EOD", 0.6), ("10:30 AM", 0.3), ("9:00 AM", 0.1))
+# The notes of the synthetic packages and how often each occurs; most packages have none
+NOTES_MIX = (("Delayed on flight---will not arrive to depot until 9:05 am", 0.05),
+             ("Can only be on truck 2", 0.05), ("", 0.9))
+
+
+def measure_table(table_class, size, stride=1, seed=0):
+    """
+    This function builds a hash table of a given size and measures its memory and throughput. The keys
+    are stride, 2 * stride, ... size * stride, so a stride that is a power of two gives keys whose low
+    bits are all the same.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    table_class : The hash table class to measure.
+    size : The number of packages to insert.
+    stride : The spacing of the keys. (default is 1, consecutive keys)
+    seed : The seed used to shuffle the miss-heavy lookups. (default is 0)
+
+    Returns:
+    dict : The memory in bytes, the bytes per item, and insert, hit, miss and miss-heavy operations per second.
+    """
+    # Every key maps to the same value, so only the table and its keys are measured
+    value = object()
+    keys = range(stride, (size + 1) * stride, stride)
+    missing = range((size + 1) * stride, (2 * size + 1) * stride, stride)
+    # One lookup in ten finds its key, in random order
+    generator = random.Random(seed)
+    miss_heavy = [generator.choice(keys) if generator.random() < 0.1 else generator.choice(missing)
+                  for _ in range(size)]
+
+    # Time the inserts without tracing, then build the table again to measure its memory
+    gc.collect()
+    start = time.perf_counter()
+    table = table_class()
+    for key in keys:
+        table.insert(key, value)
+    insert_seconds = time.perf_counter() - start
+    del table
+    gc.collect()
+    tracemalloc.start()
+    table = table_class()
+    for key in keys:
+        table.insert(key, value)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Look up every key, then the same number of keys that are not in the table
+    search = table.search
+    start = time.perf_counter()
+    for key in keys:
+        search(key)
+    hit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in missing:
+        search(key)
+    miss_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in miss_heavy:
+        search(key)
+    miss_heavy_seconds = time.perf_counter() - start
+
+    return {
+        'table': table_class.__name__,
+        'size': size,
+        'stride': stride,
+        'memory_bytes': memory,
+        'bytes_per_item': memory / size,
+        'inserts_per_second': size / insert_seconds,
+        'hits_per_second': size / hit_seconds,
+        'misses_per_second': size / miss_seconds,
+        'miss_heavy_per_second': size / miss_heavy_seconds,
+    }
+
+
+def bench_hash_tables(sizes=(1000, 100000, 1000000), strides=(1, 8192)):
+    """
+    This function measures the chaining and open-addressing hash tables at several sizes, with
+    consecutive keys, and the open-addressing table with keys spaced by a power of two as well. The
+    chaining table is left out of the spaced keys: its bucket counts are 40 times a power of two, so
+    such keys share a few buckets and a million of them would take hours to insert.
+
+    Time Complexity: O(n) per size and stride.
+
+    Parameters:
+    sizes : The numbers of packages to measure. (default is 1k, 100k and 1M)
+    strides : The key spacings to measure (see measure_table). (default is 1 and 8192)
+
+    Returns:
+    A list of result dictionaries (see measure_table).
+    """
+    results = []
+    for size in sizes:
+        for stride in strides:
+            for table_class in (ChainingHashTable, OpenAddressingHashTable):
+                if stride == 1 or table_class is OpenAddressingHashTable:
+                    results.append(measure_table(table_class, size, stride))
+    return results
+
+
+def measure_package_memory(count=100000, filename=None):
+    """
+    This function measures the memory taken by each package record. It creates count packages from
+    the rows of the package file, repeating the rows as needed, the same way load_package_data does.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    count : The number of packages to create. (default is 100000)
+    filename : The package CSV file to take the rows from. (default is the default dataset's package file)
+
+    Returns:
+    float : The number of bytes per package, including the text it keeps and its slot in the list holding it.
+    """
+    dataset = get_dataset()
+    with open(filename or dataset.package_file) as packages:
+        rows = list(csv.reader(packages))[1:]
+    # Build the address index before tracing, since every package shares it
+    address_index = dataset.address_index
+    # Copy each row while tracing, so every package gets fresh strings as it would when reading a real
+    # manifest, and the strings a package keeps are counted while the ones it drops are freed
+    copies = ([str(i)] + [field.encode().decode() for field in rows[i % len(rows)][1:]] for i in range(count))
+    gc.collect()
+    tracemalloc.start()
+    package_list = [package_from_row(row, address_index) for row in copies]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del package_list
+    return memory / count
+
+
+def generate_dataset(directory, packages=1000, address_count=100, seed=0):
+    """
+    This function writes a synthetic address, distance and package file in the layout of the bundled
+    data. The addresses are random points in a 20 x 20 mile square; the first one is the hub, at the
+    hub's real street. Distances are the straight-line distances rounded to a tenth of a mile and are
+    written as a lower triangle, like the bundled distance file. Each package goes to a random address
+    other than the hub, with deadlines and notes drawn from DEADLINE_MIX and NOTES_MIX. Rows are written
+    one at a time, so large files never have to fit in memory.
+
+    Time Complexity: O(p + a^2) - for p packages and a addresses.
+
+    Parameters:
+    directory : The directory to write addressCSV.csv, distanceCSV.csv and packageCSV.csv to. It is
+                created if needed.
+    packages : The number of packages. (default is 1000)
+    address_count : The number of addresses, including the hub. (default is 100)
+    seed : The seed of the random generator, so the same arguments always give the same files. (default is 0)
+
+    Returns:
+    str : The directory.
+
+    Raises:
+    ValueError : If there are fewer than two addresses.
+    """
+    if address_count < 2:
+        raise ValueError("A synthetic dataset needs at least two addresses")
+    generator = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    streets = ["4001 South 700 East"] + [f"{i} Synthetic Way" for i in range(1, address_count)]
+    points = [(generator.uniform(0, 20), generator.uniform(0, 20)) for _ in range(address_count)]
+    with open(os.path.join(directory, "addressCSV.csv"), "w", newline="") as address_file:
+        writer = csv.writer(address_file)
+        writer.writerow([0, "Western Governors University", streets[0]])
+        for i in range(1, address_count):
+            writer.writerow([i, f"Synthetic Stop {i}", streets[i]])
+    with open(os.path.join(directory, "distanceCSV.csv"), "w", newline="") as distance_file:
+        writer = csv.writer(distance_file)
+        for i, point in enumerate(points):
+            writer.writerow([f"{math.dist(point, points[j]):.1f}" for j in range(i + 1)])
+    deadlines, deadline_weights = zip(*DEADLINE_MIX)
+    notes, note_weights = zip(*NOTES_MIX)
+    with open(os.path.join(directory, "packageCSV.csv"), "w", newline="") as package_file:
+        writer = csv.writer(package_file)
+        writer.writerow(["ID", "STREET", "CITY", "STATE", "ZIP", "DEADLINE", "WEIGHT", "NOTES"])
+        for package_id in range(1, packages + 1):
+            writer.writerow([package_id, streets[generator.randrange(1, address_count)], "Salt Lake City", "UT",
+                             f"841{generator.randrange(100):02d}",
+                             generator.choices(deadlines, deadline_weights)[0], generator.randint(1, 100),
+                             generator.choices(notes, note_weights)[0]])
+    return directory
+
+
+def timed(name, operations, function, *args):
+    """
+    This function runs one step of the suite and times it.
+
+    Time Complexity: O(1) - on top of the step itself.
+
+    Parameters:
+    name : The name of the step.
+    operations : The number of operations the step performs, for the rate.
+    function : The function to run.
+    args : The arguments passed to the function.
+
+    Returns:
+    A tuple (result, value) with the result dictionary and the value the function returned.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    value = function(*args)
+    seconds = time.perf_counter() - start
+    return {'benchmark': name, 'operations': operations, 'seconds': seconds,
+            'per_second': operations / seconds if seconds > 0 else None}, value
+
+
+def deliver_in_routes(dataset, route_size, max_routes=None):
+    """
+    This function sends the packages out in routes of route_size packages, one truck per route, all
+    leaving the hub at 8:00 AM.
+
+    Time Complexity: O(r x s^2) - for r routes of s packages.
+
+    Parameters:
+    dataset : The Dataset holding the packages and distances.
+    route_size : The number of packages per route.
+    max_routes : The maximum number of routes to drive. (default is None, every package)
+
+    Returns:
+    int : The number of routes driven.
+    """
+    package_ids = sorted(package.ID for package in dataset.packages.values())
+    routes = range(0, len(package_ids), route_size)
+    if max_routes is not None:
+        routes = routes[:max_routes]
+    for truck_num, first in enumerate(routes, 1):
+        truck = Trucks(18, 0.0, "4001 South 700 East", datetime.timedelta(hours=8),
+                       package_ids[first:first + route_size])
+        truck_deliver_packages(truck, truck_num, dataset=dataset)
+    return len(routes)
+
+
+def run_suite(data_dir, lookups=100000, route_size=40, max_routes=200, queries=1000, seed=0):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                    BENCHMARK SUITE FUNCTION                                    |
+    |                                 Time Complexity: O(p + a^2)                                    |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function times every stage of a run on one dataset:
+                    1. load (parse): the CSV files parsed into a Dataset, without the snapshot cache.
+                    2. load (snapshot build) / load (snapshot): the same through the snapshot cache,
+                       once to write the snapshot and once to read it back. The package file is
+                       streamed in both, so only the address and distance files are cached.
+                    3. ChainingHashTable insert / search: the package table (see measure_table).
+                    4. addresses: resolving package streets to address indices.
+                    5. distance_between: looking up random pairs of addresses.
+                    6. truck_deliver_packages: routing and driving the packages in routes of
+                       route_size packages, at most max_routes of them.
+                    7. StatusEngine build / counts_at / views_at: indexing the delivered packages and
+                       answering status queries at random times.
+                 The snapshot cache is kept in a temporary directory, so the data directory is not
+                 changed and every run starts cold.
+
+    Parameters:
+    data_dir : The directory holding the CSV files, e.g. from generate_dataset.
+    lookups : The number of addresses and distance_between calls. (default is 100000)
+    route_size : The number of packages per route. (default is 40)
+    max_routes : The maximum number of routes to drive, or None for every package. (default is 200)
+    queries : The number of status queries of each kind. (default is 1000)
+    seed : The seed used to pick the lookups and query times. (default is 0)
+
+    Returns:
+    A tuple (results, sizes): a list of result dictionaries with the benchmark name, the number of
+    operations, the seconds taken and the operations per second, and a dictionary with the number of
+    packages and addresses (the hub included) that were loaded.
+    """
+    generator = random.Random(seed)
+    results = []
+
+    def load(dataset):
+        dataset.distance_matrix
+        return dataset.packages
+
+    parsed = Dataset(data_dir, cache=False)
+    result, packages = timed("load (parse)", 1, load, parsed)
+    results.append(result)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        results.append(timed("load (snapshot build)", 1, load, Dataset(data_dir, cache_dir=cache_dir))[0])
+        dataset = Dataset(data_dir, cache_dir=cache_dir)
+        results.append(timed("load (snapshot)", 1, load, dataset)[0])
+
+        size = len(packages)
+        table = measure_table(ChainingHashTable, size)
+        results.append({'benchmark': "ChainingHashTable insert", 'operations': size,
+                        'seconds': size / table['inserts_per_second'], 'per_second': table['inserts_per_second']})
+        results.append({'benchmark': "ChainingHashTable search", 'operations': size,
+                        'seconds': size / table['hits_per_second'], 'per_second': table['hits_per_second']})
+
+        streets = [package.street for package in packages.values()]
+        sample = [generator.choice(streets) for _ in range(lookups)]
+        results.append(timed("addresses", lookups, lambda: [addresses(street, dataset) for street in sample])[0])
+        count = len(dataset.distance_matrix)
+        pairs = [(generator.randrange(count), generator.randrange(count)) for _ in range(lookups)]
+        results.append(timed("distance_between", lookups,
+                             lambda: [distance_between(a, b, dataset) for a, b in pairs])[0])
+
+        routes = min(math.ceil(size / route_size), max_routes) if max_routes is not None \
+            else math.ceil(size / route_size)
+        results.append(timed("truck_deliver_packages", routes, deliver_in_routes, dataset, route_size, max_routes)[0])
+
+        result, engine = timed("StatusEngine build", size, StatusEngine, dataset.packages.values(),
+                               dataset.constraints)
+        results.append(result)
+        times = [datetime.timedelta(hours=8, seconds=generator.randrange(10 * 3600)) for _ in range(queries)]
+        results.append(timed("StatusEngine counts_at", queries, lambda: [engine.counts_at(at) for at in times])[0])
+        package_ids = engine.package_ids[:100]
+        results.append(timed("StatusEngine views_at (100 ids)", queries,
+                             lambda: [engine.views_at(at, package_ids) for at in times])[0])
+    return results, {'packages': size, 'addresses': count}
+
+
+def suite_metadata(args, sizes):
+    """
+    This function describes the run, so results from different commits and machines can be told apart.
+
+    Time Complexity: O(1) - apart from asking git for the commit.
+
+    Parameters:
+    args : The parsed command-line arguments.
+    sizes : The numbers of packages and addresses loaded (see run_suite), which differ from
+            --packages and --addresses when --data-dir is given.
+
+    Returns:
+    dict : The commit, Python version, platform, time, dataset sizes and suite options.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        'packages': sizes['packages'],
+        'addresses': sizes['addresses'],
+        'data_dir': args.data_dir,
+        'route_size': args.route_size,
+        'max_routes': args.max_routes,
+        'seed': args.seed,
+    }
+
+
+def baseline_ratios(results, baseline):
+    """
+    This function compares the suite results with an earlier run.
+
+    Time Complexity: O(b) - for b benchmarks.
+
+    Parameters:
+    results : A list of result dictionaries (see run_suite).
+    baseline : The results of an earlier run, as written with --json, or None.
+
+    Returns:
+    dict : The time per operation of each benchmark relative to the baseline (above 1.0 is slower),
+           keyed by benchmark name; None for benchmarks the baseline does not have.
+    """
+    previous = {result['benchmark']: result for result in (baseline or {}).get('results', [])}
+    ratios = {}
+    for result in results:
+        before = previous.get(result['benchmark'])
+        ratios[result['benchmark']] = (result['seconds'] / result['operations']
+                                       / (before['seconds'] / before['operations'])
+                                       if before and before['seconds'] else None)
+    return ratios
+
+
+def print_suite(results, baseline=None):
+    """
+    This function prints the suite results as a table. With a baseline from an earlier run, the time
+    per operation of each benchmark is also shown relative to it (above 1.00x is slower).
+
+    Parameters:
+    results : A list of result dictionaries (see run_suite).
+    baseline : The results of an earlier run, as written with --json. (default is None)
+    """
+    ratios = baseline_ratios(results, baseline)
+    print(f"{'Benchmark':<34}{'Operations':>12}{'Seconds':>12}{'Ops/s':>16}{'vs baseline':>14}")
+    print("—" * 88)
+    for result in results:
+        ratio = "-" if ratios[result['benchmark']] is None else f"{ratios[result['benchmark']]:.2f}x"
+        rate = "-" if result['per_second'] is None else \
+            f"{result['per_second']:,.0f}" if result['per_second'] >= 100 else f"{result['per_second']:.2f}"
+        print(f"{result['benchmark']:<34}{result['operations']:>12}{result['seconds']:>12.4f}{rate:>16}{ratio:>14}")
+
+
+def print_results(results):
+    """
+    This function prints benchmark results as a table.
+
+    Parameters:
+    results : A list of result dictionaries (see measure_table).
+    """
+    print(f"{'Table':<26}{'Size':>10}{'Stride':>8}{'Memory (MB)':>14}{'B/item':>10}"
+          f"{'Insert/s':>14}{'Hit/s':>14}{'Miss/s':>14}{'90% miss/s':>14}")
+    print("—" * 124)
+    for result in results:
+        print(f"{result['table']:<26}{result['size']:>10}{result['stride']:>8}{result['memory_bytes'] / 1e6:>14.2f}"
+              f"{result['bytes_per_item']:>10.1f}{result['inserts_per_second']:>14,.0f}"
+              f"{result['hits_per_second']:>14,.0f}{result['misses_per_second']:>14,.0f}"
+              f"{result['miss_heavy_per_second']:>14,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the package hash tables and the delivery pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="numbers of packages to measure")
+    parser.add_argument("--strides", type=int, nargs="+", default=[1, 8192],
+                        help="spacings of the hash table keys (default: 1 8192)")
+    parser.add_argument("--package-memory", action="store_true", help="measure the bytes per package record")
+    parser.add_argument("--suite", action="store_true", help="time every stage of a run on a synthetic dataset")
+    parser.add_argument("--generate", metavar="DIR", help="only write a synthetic dataset to DIR")
+    parser.add_argument("--packages", type=int, default=1000, help="synthetic packages (default: 1000)")
+    parser.add_argument("--addresses", type=int, default=100, help="synthetic addresses (default: 100)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("--data-dir", help="run the suite on these CSV files instead of a synthetic dataset")
+    parser.add_argument("--route-size", type=int, default=40, help="packages per route (default: 40)")
+    parser.add_argument("--max-routes", type=int, default=200, help="routes to drive, 0 for all (default: 200)")
+    parser.add_argument("--json", metavar="FILE", help="write the suite results as JSON to FILE, or - for stdout")
+    parser.add_argument("--compare", metavar="FILE", help="compare the suite with the JSON results of an earlier run")
+    args = parser.parse_args()
+    if args.generate:
+        generate_dataset(args.generate, args.packages, args.addresses, args.seed)
+    elif args.suite:
+        baseline = None
+        if args.compare:
+            with open(args.compare) as baseline_file:
+                baseline = json.load(baseline_file)
+        with tempfile.TemporaryDirectory() as synthetic_dir:
+            data_dir = args.data_dir or generate_dataset(synthetic_dir, args.packages, args.addresses, args.seed)
+            results, sizes = run_suite(data_dir, route_size=args.route_size, max_routes=args.max_routes or None,
+                                       seed=args.seed)
+        report = {'metadata': suite_metadata(args, sizes), 'results': results}
+        if baseline is not None:
+            # The comparison is part of the report, so it is kept whichever way the report is written
+            report['comparison'] = {'baseline': args.compare, 'ratios': baseline_ratios(results, baseline)}
+        if args.json == "-":
+            print(json.dumps(report, indent=2))
+        else:
+            print_suite(results, baseline)
+            if args.json:
+                with open(args.json, "w") as report_file:
+                    json.dump(report, report_file, indent=2)
+    elif args.package_memory:
+        print(f"Memory per package: {measure_package_memory():.1f} bytes")
+    else:
+        print_results(bench_hash_tables(args.sizes, args.strides))
@@ -3,10 +3,14 @@
     |                                                                                                |
     |                                      CONSOLE COLOR CLASS                                       |
     |              The class Colors contains the ANSI color codes for the console output.            |
+    |          The class TableRenderer prints tables with a precompiled layout in one write.         |
     |                                                                                                |
     `------------------------------------------------------------------------------------------------'
 """
 
+import os
+import sys
+
 
 class Colors:
     BLACK = "\033[0;30m"
@@ -51,3 +55,107 @@ class Colors:
     NEGATIVE = "\033[7m"
     CROSSED = "\033[9m"
     END = "\033[0m"
+
+
+def supports_color(stream=None):
+    """
+    This function decides whether ANSI colors should be written to a stream. Colors are used when the
+    stream is a terminal; the NO_COLOR and FORCE_COLOR environment variables override the check.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Parameters:
+    stream : The file the output goes to. (default is None, standard output)
+
+    Returns:
+    bool : True if colors should be written.
+    """
+    if os.environ.get("NO_COLOR"):
+        return False
+    if os.environ.get("FORCE_COLOR"):
+        return True
+    isatty = getattr(stream or sys.stdout, "isatty", None)
+    return bool(isatty and isatty())
+
+
+class TableRenderer:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                     TABLE RENDERER CLASS                                       |
+    |                                   Time Complexity: O(n x c)                                    |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class prints rows as a table. The layout (the cell function and width of each
+                 column, the header, and the rule under it) is compiled once when the renderer is
+                 created, so printing a row only calls the cell functions and pads their results.
+                 All rows are joined into one string and written with a single write, instead of one
+                 print per row.
+
+    Methods:
+        1. __init__: Compiles the layout from a list of columns.
+        2. format_row: Formats one row.
+        3. render: Formats the header and every row into one string.
+        4. write: Writes the rendered table to a stream.
+
+    Time Complexity:
+        - __init__: O(c) for c columns.
+        - format_row: O(c).
+        - render / write: O(n x c) for n rows.
+
+    Attributes:
+    columns : A tuple of (cell, width) pairs; cell turns a row into the text of the column.
+    header : The header line, or None for no header.
+    rule : The line under the header, or None for no rule.
+    """
+
+    def __init__(self, columns, header=None, rule=None):
+        """
+        Compiles the layout.
+
+        Parameters:
+        columns : A list of (title, width, cell) tuples. Each cell is a function that takes a row and
+                  returns the text of the column, which is padded to the width.
+        header : The header line. (default is None, the titles padded to the column widths)
+        rule : The line under the header. (default is None, a line of dashes as wide as the table)
+        """
+        self.columns = tuple((cell, width) for title, width, cell in columns)
+        if header is None:
+            header = "".join(title.ljust(width) for title, width, cell in columns).rstrip()
+        if rule is None:
+            rule = "—" * sum(width for title, width, cell in columns)
+        self.header = header
+        self.rule = rule
+
+    def format_row(self, row):
+        """
+        Returns one row of the table, without a line break.
+        """
+        return "".join(cell(row).ljust(width) for cell, width in self.columns)
+
+    def render(self, rows, header=True):
+        """
+        Formats the table into one string.
+
+        Parameters:
+        rows : An iterable of rows.
+        header : True to start with the header and the rule. (default is True)
+
+        Returns:
+        str : The table, one line per row, ending with a line break.
+        """
+        lines = [self.header, self.rule] if header else []
+        lines = [line for line in lines if line is not None]
+        format_row = self.format_row
+        lines.extend(format_row(row) for row in rows)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, rows, out=None, header=True):
+        """
+        Writes the table with a single write.
+
+        Parameters:
+        rows : An iterable of rows.
+        out : The file to write to. (default is None, standard output)
+        header : True to start with the header and the rule. (default is True)
+        """
+        (out or sys.stdout).write(self.render(rows, header))
@@ -0,0 +1,238 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                   PACKAGE CONSTRAINTS MODULE                                   |
+    |     Compiles the free-text NOTES of the package file into typed constraints, once, at load.    |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+"""
+
+import datetime
+import re
+
+# Patterns for the special notes found in the package file
+TRUCK_ONLY = re.compile(r"can only be on truck (\d+)", re.IGNORECASE)
+DELIVERED_WITH = re.compile(r"must be delivered with ([\d,\s]+)", re.IGNORECASE)
+DELAYED_UNTIL = re.compile(r"will not arrive to depot until (\d{1,2}:\d{2}\s*[ap]m)", re.IGNORECASE)
+WRONG_ADDRESS = re.compile(r"wrong address listed", re.IGNORECASE)
+
+
+def parse_clock(text):
+    """
+    This function converts a clock time such as "9:05 am" into a time after midnight.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Parameters:
+    text : The clock time with an am/pm suffix.
+
+    Returns:
+    datetime.timedelta : The time after midnight.
+    """
+    parsed = datetime.datetime.strptime("".join(text.upper().split()), "%I:%M%p")
+    return datetime.timedelta(hours=parsed.hour, minutes=parsed.minute)
+
+
+class TruckRestriction:
+    """
+    A constraint that a package can only be loaded onto one truck.
+
+    Attributes:
+    truck : The number of the truck (1-based, as written in the notes).
+    """
+    __slots__ = ("truck",)
+
+    def __init__(self, truck):
+        self.truck = truck
+
+
+class CoDeliveryGroup:
+    """
+    A constraint that a package must be delivered together with other packages.
+
+    Attributes:
+    package_ids : The IDs of the other packages, as listed in the notes.
+    """
+    __slots__ = ("package_ids",)
+
+    def __init__(self, package_ids):
+        self.package_ids = package_ids
+
+
+class EarliestAvailability:
+    """
+    A constraint that a package is not at the hub before a given time.
+
+    Attributes:
+    time : The time after midnight the package arrives at the hub, as a datetime.timedelta.
+    """
+    __slots__ = ("time",)
+
+    def __init__(self, time):
+        self.time = time
+
+
+class AddressChange:
+    """
+    A constraint that a package's listed address is replaced at a given time.
+
+    Attributes:
+    time : The time after midnight the corrected address is known, or None if it is not known yet.
+    street : The corrected street address, or None if it is not known yet.
+    zip : The corrected zip code, or None if it is not known yet.
+    listed_street : The street address listed in the package file.
+    listed_zip : The zip code listed in the package file.
+    """
+    __slots__ = ("time", "street", "zip", "listed_street", "listed_zip")
+
+    def __init__(self, time, street, zip, listed_street, listed_zip):
+        self.time = time
+        self.street = street
+        self.zip = zip
+        self.listed_street = listed_street
+        self.listed_zip = listed_zip
+
+
+def compile_notes(package, corrections=None):
+    """
+    This function compiles the NOTES text of one package into constraint objects.
+
+    Time Complexity: O(m) - where m is the length of the notes.
+
+    Parameters:
+    package : The package object, with its ID, listed street and zip code, and notes.
+    corrections : A dictionary mapping package IDs to (time, street, zip) tuples for the packages whose
+                  address is corrected during the day. (default is None)
+
+    Returns:
+    A list of TruckRestriction, CoDeliveryGroup, EarliestAvailability and AddressChange objects.
+    """
+    compiled = []
+    notes = package.notes
+    if not notes:
+        return compiled
+    match = TRUCK_ONLY.search(notes)
+    if match:
+        compiled.append(TruckRestriction(int(match.group(1))))
+    match = DELIVERED_WITH.search(notes)
+    if match:
+        compiled.append(CoDeliveryGroup(tuple(int(other) for other in re.findall(r"\d+", match.group(1)))))
+    match = DELAYED_UNTIL.search(notes)
+    if match:
+        compiled.append(EarliestAvailability(parse_clock(match.group(1))))
+    if WRONG_ADDRESS.search(notes):
+        time, street, zip = (corrections or {}).get(package.ID, (None, None, None))
+        compiled.append(AddressChange(time, street, zip, package.street, package.zip))
+    return compiled
+
+
+class ConstraintTable:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                    CONSTRAINT TABLE CLASS                                      |
+    |                                   Time Complexity: O(1)                                        |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class stores the compiled constraints of every package, indexed by package ID.
+                 Each kind of constraint is kept in its own dictionary, and only packages that have
+                 that constraint get an entry, so the planner and the status lookup can answer
+                 "which truck / which group / available when / which address" in O(1) without
+                 re-reading the notes or branching on package IDs.
+
+                 Co-delivery groups are closed transitively: if 14 must go with 15 and 16 must go with
+                 14, all three share one group.
+
+    Methods:
+        1. __init__: Creates an empty table.
+        2. add: Compiles and stores the notes of one package.
+        3. truck_for: Returns the only truck a package may be loaded onto.
+        4. group_of: Returns the co-delivery group of a package.
+        5. available_at: Returns the time a package arrives at the hub.
+        6. address_change: Returns the address change of a package.
+        7. street_at: Returns the street and zip code of a package at a given time.
+
+    Time Complexity:
+        - add: O(m) for m characters of notes, plus O(g) to merge a group of g packages.
+        - all queries: O(1).
+    """
+
+    def __init__(self, corrections=None):
+        """
+        Constructs an empty table.
+
+        Parameters:
+        corrections : A dictionary mapping package IDs to (time, street, zip) tuples for the packages
+                      whose address is corrected during the day. (default is None)
+        """
+        self.corrections = corrections or {}
+        self.trucks = {}
+        self.groups = {}
+        self.availability = {}
+        self.address_changes = {}
+
+    def add(self, package):
+        """
+        Compiles the notes of a package and stores the resulting constraints.
+
+        Parameters:
+        package : The package object, with its ID, listed street and zip code, and notes.
+        """
+        package_id = package.ID
+        for constraint in compile_notes(package, self.corrections):
+            if isinstance(constraint, TruckRestriction):
+                self.trucks[package_id] = constraint.truck
+            elif isinstance(constraint, CoDeliveryGroup):
+                # Merge the package's group with the groups of every package it must travel with
+                group = {package_id, *constraint.package_ids}
+                for member in list(group):
+                    group |= self.groups.get(member, frozenset())
+                group = frozenset(group)
+                for member in group:
+                    self.groups[member] = group
+            elif isinstance(constraint, EarliestAvailability):
+                self.availability[package_id] = constraint.time
+            elif isinstance(constraint, AddressChange):
+                self.address_changes[package_id] = constraint
+
+    def truck_for(self, package_id):
+        """
+        Returns the number of the only truck a package may be loaded onto, or None if any truck will do.
+        """
+        return self.trucks.get(package_id)
+
+    def group_of(self, package_id):
+        """
+        Returns the frozenset of package IDs that must be delivered together with a package, including
+        the package itself, or None if the package has no co-delivery constraint.
+        """
+        return self.groups.get(package_id)
+
+    def available_at(self, package_id):
+        """
+        Returns the time a package arrives at the hub, or None if it is there from the start of the day.
+        """
+        return self.availability.get(package_id)
+
+    def address_change(self, package_id):
+        """
+        Returns the AddressChange of a package, or None if its listed address is correct.
+        """
+        return self.address_changes.get(package_id)
+
+    def street_at(self, package, time):
+        """
+        Returns the street and zip code a package is addressed to at a given time.
+
+        Parameters:
+        package : The package object.
+        time : The time after midnight, as a datetime.timedelta.
+
+        Returns:
+        A tuple (street, zip) with the corrected address once it is known, otherwise the listed one.
+        """
+        change = self.address_changes.get(package.ID)
+        if change is None:
+            return package.street, package.zip
+        if change.time is not None and time > change.time:
+            return change.street, change.zip
+        return change.listed_street, change.listed_zip
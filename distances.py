@@ -0,0 +1,343 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                     DISTANCE MATRIX MODULE                                     |
+    |          The DistanceMatrix class holds the distances between every pair of addresses.         |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+"""
+
+import csv
+import heapq
+from array import array
+
+# NumPy is optional. When it is not installed the matrix is stored in a flat array('d') instead.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class DistanceMatrix:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                     DISTANCE MATRIX CLASS                                      |
+    |                                   Time Complexity: O(1)                                        |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class stores a symmetric n x n matrix of distances in miles as one contiguous
+                 block of floats. When NumPy is available the block is a 2D float64 ndarray, otherwise
+                 it is a flat array('d') in row-major order. Both layouts are parsed once, so looking
+                 up a distance no longer re-reads the CSV strings.
+
+    Methods:
+        1. __init__: Wraps an existing block of n x n floats.
+        2. from_rows: Builds the matrix from the lower-triangular rows of the distance CSV file.
+        3. d: Returns the distance between two address indices.
+        4. row: Returns the distances from one address to every address.
+        5. column: Returns the distances from every address to one address.
+
+    Time Complexity:
+        - __init__: O(1).
+        - from_rows: O(n^2).
+        - d: O(1).
+        - row / column: O(1) for NumPy views and array('d') rows, O(n) for array('d') columns.
+
+    Attributes:
+    size : The number of addresses in the matrix.
+    data : The n x n ndarray, or the flat array('d') of n * n floats.
+    """
+
+    def __init__(self, size, data):
+        """
+        Constructs the matrix from an existing block of floats.
+
+        Parameters:
+        size : The number of addresses in the matrix.
+        data : A 2D ndarray of shape (size, size), or a flat buffer of size * size floats.
+        """
+        self.size = size
+        self.data = data
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Builds a symmetric matrix from the rows of the distance CSV file. Empty cells are filled from
+        the mirrored cell, so a lower-triangular file produces a full matrix.
+
+        Parameters:
+        rows : A list of lists of distance strings, one row per address.
+
+        Returns:
+        DistanceMatrix : The parsed matrix.
+
+        Raises:
+        ValueError : If a cell and its mirrored cell are both empty.
+        """
+        size = len(rows)
+        flat = array('d', bytes(8 * size * size))
+        for i in range(size):
+            for j in range(size):
+                # Use the cell itself, or the mirrored cell when the file only stores one half
+                cell = rows[i][j] if j < len(rows[i]) else ''
+                if cell == '':
+                    cell = rows[j][i] if i < len(rows[j]) else ''
+                if cell == '':
+                    raise ValueError(f"Missing distance between addresses {i} and {j}")
+                flat[i * size + j] = float(cell)
+        if np is not None:
+            return cls(size, np.frombuffer(flat, dtype=np.float64).reshape(size, size).copy())
+        return cls(size, flat)
+
+    def __len__(self):
+        """
+        Returns the number of addresses in the matrix.
+        """
+        return self.size
+
+    def d(self, i, j):
+        """
+        Returns the distance between two address indices.
+
+        Parameters:
+        i : The index of the first address.
+        j : The index of the second address.
+
+        Returns:
+        float : The distance in miles.
+        """
+        if np is not None:
+            return self.data.item(i, j)
+        return self.data[i * self.size + j]
+
+    def row(self, i):
+        """
+        Returns the distances from address i to every address.
+
+        Parameters:
+        i : The index of the address.
+
+        Returns:
+        An ndarray view, or a memoryview over the array('d') row. Neither copies the data.
+        """
+        if np is not None:
+            return self.data[i]
+        return memoryview(self.data)[i * self.size:(i + 1) * self.size]
+
+    def column(self, j):
+        """
+        Returns the distances from every address to address j. Because the matrix is symmetric this
+        holds the same values as row(j).
+
+        Parameters:
+        j : The index of the address.
+
+        Returns:
+        An ndarray view, or an array('d') copy of the column.
+        """
+        if np is not None:
+            return self.data[:, j]
+        return self.data[j::self.size]
+
+
+def nearest_neighbours(matrix, k, address_ids=None):
+    """
+    This function lists the k nearest other addresses of every address, nearest first. Routing uses
+    these lists to look at a few likely candidates before, or instead of, every address. With NumPy
+    each row is split with argpartition, so only the k chosen entries are sorted; without it each row
+    goes through heapq.nsmallest.
+
+    Time Complexity: O(m^2 + m k log k) - for the m addresses listed.
+
+    Parameters:
+    matrix : The DistanceMatrix that holds the distances between addresses.
+    k : The number of neighbours to keep per address. At most m - 1 are kept.
+    address_ids : The addresses to list, e.g. the stops of one route; neighbours are only chosen among
+                  them. (default is None, every address in the matrix)
+
+    Returns:
+    A list with one list of address indices per address, or with address_ids, a dictionary mapping
+    each of them to its list.
+    """
+    ids = list(range(matrix.size)) if address_ids is None else list(dict.fromkeys(address_ids))
+    size = len(ids)
+    k = min(k, size - 1)
+    if k <= 0:
+        lists = [[] for _ in ids]
+    elif np is not None:
+        if address_ids is None:
+            distances = np.array(matrix.data, dtype=np.float64).reshape(size, size)
+        else:
+            distances = np.asarray(matrix.data).reshape(matrix.size, matrix.size)[np.ix_(ids, ids)]
+        # An address is not its own neighbour
+        np.fill_diagonal(distances, np.inf)
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1, kind="stable")
+        lists = np.asarray(ids)[np.take_along_axis(nearest, order, axis=1)].tolist()
+    else:
+        lists = []
+        for i in ids:
+            row = matrix.row(i)
+            lists.append(heapq.nsmallest(k, (j for j in ids if j != i), key=row.__getitem__))
+    if address_ids is None:
+        return lists
+    return dict(zip(ids, lists))
+
+
+def load_distance_matrix(filename):
+    """
+    This function loads the distance CSV file into a DistanceMatrix.
+
+    Time Complexity: O(n^2)
+
+    Parameters:
+    filename : The name of the CSV file containing the distance table.
+
+    Returns:
+    DistanceMatrix : The parsed matrix.
+    """
+    with open(filename) as distances:
+        return DistanceMatrix.from_rows(list(csv.reader(distances)))
+
+
+class UnvisitedStops:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                    UNVISITED STOPS CLASS                                       |
+    |                                   Time Complexity: O(n)                                        |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class tracks which candidate stops of a route have not been visited yet. Each
+                 candidate is mapped to an address index in a DistanceMatrix, and visited candidates
+                 are masked out instead of being removed from a list. The nearest unvisited candidate
+                 is found with one argmin over a row of the matrix (a vectorized NumPy argmin, or the
+                 built-in min over a list when NumPy is not installed).
+
+                 Ties are broken in favour of the last candidate with the minimal distance, which is
+                 the same result a `<=` comparison loop over the candidates gives.
+
+                 When neighbour lists are given (see nearest_neighbours), nearest first looks only at
+                 the origin and its k nearest addresses. If an unvisited candidate there is strictly
+                 closer than the last address in the list, no other candidate can be closer, so it is
+                 returned after O(k) work; otherwise the full argmin runs. Either way the result is
+                 the same as without the lists.
+
+    Methods:
+        1. __init__: Builds the mask for a list of candidate address indices.
+        2. nearest: Returns the nearest unvisited candidate to an address.
+        3. visit: Marks a candidate as visited.
+        4. is_visited: Returns True if a candidate has been visited.
+
+    Time Complexity:
+        - __init__: O(n).
+        - nearest: O(k) when a neighbour list holds the answer, otherwise O(n) vectorized.
+        - visit / is_visited: O(1).
+    """
+
+    def __init__(self, matrix, address_ids, neighbours=None):
+        """
+        Constructs the mask with every candidate unvisited.
+
+        Parameters:
+        matrix : The DistanceMatrix that holds the distances between addresses.
+        address_ids : The address index of each candidate, in candidate order.
+        neighbours : The neighbour lists of every address (see nearest_neighbours). (default is None,
+                     always search every candidate)
+        """
+        self.matrix = matrix
+        self.count = len(address_ids)
+        self.remaining = self.count
+        self.neighbours = neighbours
+        # The candidates at each address, for the neighbour list lookups
+        self.candidates_at = {}
+        if neighbours is not None:
+            for candidate, address_id in enumerate(address_ids):
+                self.candidates_at.setdefault(int(address_id), []).append(candidate)
+        if np is not None:
+            self.address_ids = np.asarray(address_ids, dtype=np.intp)
+            self.unvisited = np.ones(self.count, dtype=bool)
+        else:
+            self.address_ids = list(address_ids)
+            self.unvisited = [True] * self.count
+
+    def __len__(self):
+        """
+        Returns the number of unvisited candidates.
+        """
+        return self.remaining
+
+    def nearest(self, origin):
+        """
+        Finds the unvisited candidate closest to an address.
+
+        Parameters:
+        origin : The address index to measure from.
+
+        Returns:
+        A tuple (candidate, distance) with the position of the nearest candidate and its distance.
+        """
+        if self.neighbours is not None:
+            found = self.nearest_listed(origin)
+            if found is not None:
+                return found
+        if np is not None:
+            # Gather the distances to every candidate and mask out the visited ones
+            distances = np.where(self.unvisited, self.matrix.row(origin)[self.address_ids], np.inf)
+            # Take the argmin of the reversed row so that the last of equal candidates wins
+            candidate = self.count - 1 - int(np.argmin(distances[::-1]))
+            return candidate, float(distances[candidate])
+        row = self.matrix.row(origin)
+        inf = float('inf')
+        distances = [row[a] if v else inf for a, v in zip(self.address_ids, self.unvisited)]
+        shortest = min(distances)
+        # Search the reversed list so that the last of equal candidates wins
+        distances.reverse()
+        candidate = self.count - 1 - distances.index(shortest)
+        return candidate, shortest
+
+    def nearest_listed(self, origin):
+        """
+        Finds the nearest unvisited candidate among the origin and its neighbour list.
+
+        Parameters:
+        origin : The address index to measure from.
+
+        Returns:
+        A tuple (candidate, distance), or None if the neighbour list cannot prove which candidate is nearest.
+        """
+        listed = self.neighbours[origin]
+        if not listed:
+            return None
+        d = self.matrix.d
+        unvisited = self.unvisited
+        best = None
+        for address_id in [origin] + listed:
+            for candidate in self.candidates_at.get(address_id, ()):
+                if unvisited[candidate]:
+                    distance = d(origin, address_id)
+                    if best is None or distance < best[1] or (distance == best[1] and candidate > best[0]):
+                        best = (candidate, distance)
+        # A candidate outside the list is at least as far as the last listed address
+        if best is None or best[1] >= d(origin, listed[-1]):
+            return None
+        return best
+
+    def visit(self, candidate):
+        """
+        Marks a candidate as visited.
+
+        Parameters:
+        candidate : The position of the candidate.
+        """
+        if self.unvisited[candidate]:
+            self.unvisited[candidate] = False
+            self.remaining -= 1
+
+    def is_visited(self, candidate):
+        """
+        Returns True if a candidate has been visited.
+
+        Parameters:
+        candidate : The position of the candidate.
+        """
+        return not self.unvisited[candidate]
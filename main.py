@@ -15,12 +15,30 @@ that can adapt to real-time logistical changes.
 
 """
 
+import argparse
+import concurrent.futures
+import contextlib
 import csv
 import datetime
+import functools
+import gzip
+import itertools
+import json
+import os
+import sys
 import time
 import re
 
-from console import Colors
+from console import Colors, TableRenderer, supports_color
+from distances import UnvisitedStops, load_distance_matrix, nearest_neighbours
+from paths import load_or_build_closure, shortest_path_closure
+from profiling import Profiler
+from snapshot import load_or_build
+from status import StatusEngine
+from taskgraph import run_task_graph
+from optimize import improve_route
+from constraints import ConstraintTable
+from planner import plan_loads
 
 
 def log_truck_metrics_with_date(truck, truck_num):
@@ -73,35 +91,93 @@ class ChainingHashTable:
 
     Description: This class represents a hash table with chaining implementation, allowing
                  the storage of key-value pairs. In cases of hash collisions, the colliding
-                 items are stored in a linked list.
+                 items are stored in a linked list. When the number of items per bucket (the
+                 load factor) exceeds max_load_factor, the number of buckets is doubled and
+                 every item is rehashed, so chains stay short however many items are stored.
     Methods:
         1. __init__: Initializes the hash table with an initial capacity.
         2. print_table: Prints the hash table.
         3. insert: Inserts an item into the hash table.
         4. search: Searches for an item based on the key.
         5. remove: Removes an item from the hash table based on the key.
+        6. values: Returns every item in the hash table.
+        7. __len__: Returns the number of items in the hash table.
+        8. load_factor: Returns the number of items per bucket.
+        9. bucket_stats: Returns statistics about the bucket lengths.
+        10. insert_many: Inserts a batch of items into the hash table.
+        11. probe_length: Returns the number of entries a search compares.
 
     Time Complexity:
         - __init__: O(n).
         - print_table: O(n + m).
-        - insert: O(1) average and O(n) worst case.
-        - search: O(1) average and O(n) worst case.
+        - insert: O(1) amortized and O(n) worst case.
+        - insert_many: O(k) for k items, with at most one resize.
+        - search / probe_length: O(1) average and O(n) worst case.
         - remove: O(1) average and O(n) worst case.
+        - values: O(n + m).
+        - __len__ / load_factor: O(1).
+        - bucket_stats: O(m).
 
     Attributes:
     table : a list of lists that will be used to store the keys and values of the hash table
+    count : the number of key-value pairs stored in the hash table
+    max_load_factor : the load factor above which the hash table grows
 
     """
 
-    def __init__(self, init_capacity=40):
+    def __init__(self, init_capacity=40, max_load_factor=0.75):
         """
         Constructs all the necessary attributes for the hash table object.
         """
         # Initialize an empty list to hold the hash table's buckets
         self.table = []
         # Create a number of empty buckets equal to the initial capacity
-        for i in range(init_capacity):
+        for i in range(max(init_capacity, 1)):
             self.table.append([])
+        # Track the number of items and the load factor that triggers a resize
+        self.count = 0
+        self.max_load_factor = max_load_factor
+
+    def __len__(self):
+        """
+        Returns the number of key-value pairs in the hash table.
+        """
+        return self.count
+
+    @property
+    def load_factor(self):
+        """
+        Returns the average number of key-value pairs per bucket.
+        """
+        return self.count / len(self.table)
+
+    def bucket_stats(self):
+        """
+        Returns statistics about the lengths of the buckets.
+
+        Returns:
+        dict : The number of buckets, the number of empty buckets, and the mean and longest bucket length.
+        """
+        lengths = [len(bucket_list) for bucket_list in self.table]
+        return {
+            'buckets': len(lengths),
+            'empty': lengths.count(0),
+            'mean': self.count / len(lengths),
+            'max': max(lengths),
+        }
+
+    def resize(self, capacity):
+        """
+        Rehashes every key-value pair into a new list of buckets.
+
+        Parameters:
+        capacity : The number of buckets in the new table.
+        """
+        old_table = self.table
+        self.table = [[] for _ in range(capacity)]
+        for bucket_list in old_table:
+            for key_value in bucket_list:
+                self.table[hash(key_value[0]) % capacity].append(key_value)
 
     def print_table(self):
         """
@@ -135,8 +211,34 @@ class ChainingHashTable:
         # If the key does not exist, append a new key-value pair to the bucket list and return True
         key_value = [key, item]
         bucket_list.append(key_value)
+        self.count += 1
+        # Double the number of buckets once the load factor is exceeded
+        if self.count > self.max_load_factor * len(self.table):
+            self.resize(2 * len(self.table))
         return True
 
+    def insert_many(self, key_values):
+        """
+        Inserts a batch of key-value pairs into the hash table. The table is grown once, up front, to
+        fit the whole batch, instead of doubling several times while the batch is inserted.
+
+        Parameters:
+        key_values : An iterable of (key, item) pairs.
+
+        Returns:
+        int : The number of pairs inserted.
+        """
+        key_values = list(key_values)
+        capacity = len(self.table)
+        while self.count + len(key_values) > self.max_load_factor * capacity:
+            capacity *= 2
+        if capacity != len(self.table):
+            self.resize(capacity)
+        insert = self.insert
+        for key, item in key_values:
+            insert(key, item)
+        return len(key_values)
+
     def search(self, key):
         """
         Searches for a key in the hash table and returns its corresponding value.
@@ -153,6 +255,17 @@ class ChainingHashTable:
         # If the key does not exist, return None
         return None
 
+    def probe_length(self, key):
+        """
+        Returns the number of key-value pairs a search for a key compares: its position in its bucket,
+        or the whole bucket if the key is not in the table.
+        """
+        bucket_list = self.table[hash(key) % len(self.table)]
+        for position, key_value in enumerate(bucket_list, 1):
+            if key_value[0] == key:
+                return position
+        return len(bucket_list)
+
     def remove(self, key):
         """
         Removes a key and its corresponding value from the hash table.
@@ -166,13 +279,273 @@ class ChainingHashTable:
             if key_value[0] == key:
                 # If the key exists, remove the key-value pair from the bucket list and return True
                 bucket_list.remove(key_value)
+                self.count -= 1
                 return True
         # If the key does not exist, return False
         return False
 
+    def values(self):
+        """
+        Returns a list of every item in the hash table, in bucket order.
+        """
+        return [key_value[1] for bucket_list in self.table for key_value in bucket_list]
+
+
+# Markers for open-addressing slots that have never been used and slots whose item was removed
+EMPTY = object()
+DELETED = object()
+# Open addressing mixes this many more bits of the hash into the probe sequence after each collision
+PERTURB_SHIFT = 5
+# Hashes are taken as unsigned 64-bit numbers, so negative hashes perturb the probes the same way
+HASH_BITS = (1 << 64) - 1
+
+
+class OpenAddressingHashTable:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                           HASH TABLE WITH OPEN ADDRESSING CLASS                                |
+    |                                Time Complexity: O(1) - O(n)                                    |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class represents a hash table with open addressing, with the same insert,
+                 search and remove methods as ChainingHashTable. Keys and values are kept in two
+                 parallel lists of slots instead of a list of [key, value] lists per bucket, so an
+                 item costs no allocations of its own. The first slot tried is given by the low bits of
+                 the key's hash, so consecutive integer keys fill consecutive slots without colliding.
+                 Collisions are resolved like CPython's dict: the next slot is 5 * slot + 1 + perturb,
+                 where perturb starts as the whole hash and is shifted right by PERTURB_SHIFT bits at
+                 every step. The high bits of the hash then spread colliding keys over the table, so
+                 keys that share their low bits (e.g. multiples of a power of two) and searches for
+                 missing keys do not walk along one long run of full slots, and once perturb reaches
+                 zero the sequence still visits every slot. Removed items leave
+                 a DELETED marker (a tombstone) so later probes keep going past them. The slot count
+                 is a power of two and is doubled once used slots (items plus tombstones) exceed
+                 max_load_factor; a resize also drops every tombstone.
+    Methods:
+        1. __init__: Initializes the hash table with an initial capacity.
+        2. insert: Inserts an item into the hash table.
+        3. search: Searches for an item based on the key.
+        4. remove: Removes an item from the hash table based on the key.
+        5. values: Returns every item in the hash table.
+        6. __len__: Returns the number of items in the hash table.
+        7. load_factor: Returns the fraction of slots holding an item.
+        8. insert_many: Inserts a batch of items into the hash table.
+        9. probe_length: Returns the number of slots a search looks at.
+
+    Time Complexity:
+        - __init__: O(n).
+        - insert: O(1) amortized and O(n) worst case.
+        - insert_many: O(k) for k items, with at most one resize.
+        - search / probe_length: O(1) average and O(n) worst case.
+        - remove: O(1) average and O(n) worst case.
+        - values: O(m).
+        - __len__ / load_factor: O(1).
+
+    Attributes:
+    keys : the list of slots holding the keys, EMPTY or DELETED
+    items : the list of slots holding the values, parallel to keys
+    count : the number of key-value pairs stored in the hash table
+    used : the number of slots holding a key or a tombstone
+    max_load_factor : the fraction of used slots above which the hash table grows
+
+    """
+
+    def __init__(self, init_capacity=64, max_load_factor=0.7):
+        """
+        Constructs all the necessary attributes for the hash table object.
+        """
+        # Round the capacity up to a power of two so the slot index can be taken with a bit mask
+        capacity = 8
+        while capacity < init_capacity:
+            capacity *= 2
+        self.keys = [EMPTY] * capacity
+        self.items = [None] * capacity
+        self.mask = capacity - 1
+        self.count = 0
+        self.used = 0
+        self.max_load_factor = max_load_factor
+
+    def __len__(self):
+        """
+        Returns the number of key-value pairs in the hash table.
+        """
+        return self.count
+
+    @property
+    def load_factor(self):
+        """
+        Returns the fraction of slots that hold a key-value pair.
+        """
+        return self.count / len(self.keys)
+
+    def slot(self, key):
+        """
+        Returns the slot holding a key, or the slot where it should be inserted.
+        """
+        keys = self.keys
+        mask = self.mask
+        # Start probing at the hashed slot
+        perturb = hash(key) & HASH_BITS
+        index = perturb & mask
+        tombstone = None
+        while True:
+            slot_key = keys[index]
+            if slot_key is EMPTY:
+                # The key is not in the table; reuse the first tombstone seen on the way, if any
+                return index if tombstone is None else tombstone
+            if slot_key is DELETED:
+                if tombstone is None:
+                    tombstone = index
+            elif slot_key == key:
+                return index
+            # Move on to the next slot, mixing in the next bits of the hash
+            perturb >>= PERTURB_SHIFT
+            index = (5 * index + 1 + perturb) & mask
+
+    def resize(self, capacity):
+        """
+        Reinserts every key-value pair into a new list of slots, dropping the tombstones.
+
+        Parameters:
+        capacity : The number of slots in the new table, a power of two.
+        """
+        old_keys, old_items = self.keys, self.items
+        self.keys = [EMPTY] * capacity
+        self.items = [None] * capacity
+        self.mask = capacity - 1
+        self.used = self.count
+        keys, items, mask = self.keys, self.items, self.mask
+        for key, item in zip(old_keys, old_items):
+            if key is not EMPTY and key is not DELETED:
+                perturb = hash(key) & HASH_BITS
+                index = perturb & mask
+                while keys[index] is not EMPTY:
+                    perturb >>= PERTURB_SHIFT
+                    index = (5 * index + 1 + perturb) & mask
+                keys[index] = key
+                items[index] = item
+
+    def insert(self, key, item):
+        """
+        Inserts a key-value pair into the hash table.
+        """
+        index = self.slot(key)
+        slot_key = self.keys[index]
+        if slot_key is EMPTY or slot_key is DELETED:
+            # A new key: fill the slot, counting it as used unless it was a tombstone
+            if slot_key is EMPTY:
+                self.used += 1
+            self.keys[index] = key
+            self.count += 1
+        self.items[index] = item
+        # Grow the table once too many slots are in use, or just clear tombstones if most of them are
+        if self.used > self.max_load_factor * len(self.keys):
+            if self.count > self.max_load_factor * len(self.keys) / 2:
+                self.resize(2 * len(self.keys))
+            else:
+                self.resize(len(self.keys))
+        return True
+
+    def insert_many(self, key_values):
+        """
+        Inserts a batch of key-value pairs into the hash table. The table is grown once, up front, to
+        fit the whole batch, instead of doubling several times while the batch is inserted.
+
+        Parameters:
+        key_values : An iterable of (key, item) pairs.
+
+        Returns:
+        int : The number of pairs inserted.
+        """
+        key_values = list(key_values)
+        if self.used + len(key_values) > self.max_load_factor * len(self.keys):
+            capacity = len(self.keys)
+            while self.count + len(key_values) > self.max_load_factor * capacity:
+                capacity *= 2
+            self.resize(capacity)
+        insert = self.insert
+        for key, item in key_values:
+            insert(key, item)
+        return len(key_values)
+
+    def search(self, key):
+        """
+        Searches for a key in the hash table and returns its corresponding value.
+        """
+        keys = self.keys
+        mask = self.mask
+        perturb = hash(key) & HASH_BITS
+        index = perturb & mask
+        while True:
+            slot_key = keys[index]
+            if slot_key is EMPTY:
+                # If the key does not exist, return None
+                return None
+            if slot_key is not DELETED and slot_key == key:
+                return self.items[index]
+            perturb >>= PERTURB_SHIFT
+            index = (5 * index + 1 + perturb) & mask
+
+    def probe_length(self, key):
+        """
+        Returns the number of slots a search for a key looks at, including the slot holding the key or
+        the empty slot that ends the search.
+        """
+        keys = self.keys
+        mask = self.mask
+        perturb = hash(key) & HASH_BITS
+        index = perturb & mask
+        probes = 1
+        while keys[index] is not EMPTY and (keys[index] is DELETED or keys[index] != key):
+            perturb >>= PERTURB_SHIFT
+            index = (5 * index + 1 + perturb) & mask
+            probes += 1
+        return probes
+
+    def remove(self, key):
+        """
+        Removes a key and its corresponding value from the hash table.
+        """
+        index = self.slot(key)
+        slot_key = self.keys[index]
+        if slot_key is EMPTY or slot_key is DELETED:
+            # If the key does not exist, return False
+            return False
+        # Leave a tombstone so probes for other keys keep going past this slot
+        self.keys[index] = DELETED
+        self.items[index] = None
+        self.count -= 1
+        return True
+
+    def values(self):
+        """
+        Returns a list of every item in the hash table, in slot order.
+        """
+        return [item for key, item in zip(self.keys, self.items) if key is not EMPTY and key is not DELETED]
 
-# Initialize HashTable
-packageHash = ChainingHashTable()
+
+# Address corrections received during the day: package ID -> (time known, corrected street, corrected zip)
+address_corrections = {9: (datetime.timedelta(hours=10, minutes=20), "410 S State St", "84111")}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_deadline(deadline):
+    """
+    This function converts a deadline from the package file into a time of day. Results are cached,
+    so each distinct deadline string is only parsed once however many packages share it.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Parameters:
+    deadline : The deadline as listed in the package file, e.g. "10:30 AM" or "EOD".
+
+    Returns:
+    datetime.timedelta : The deadline as a time after midnight, or None for end-of-day deadlines.
+    """
+    if deadline.strip().upper() == "EOD":
+        return None
+    parsed = datetime.datetime.strptime(deadline.strip().upper(), "%I:%M %p")
+    return datetime.timedelta(hours=parsed.hour, minutes=parsed.minute)
 
 
 class Packages:
@@ -183,14 +556,19 @@ class Packages:
     Constructor and Basic Operations: O(1)
     Batch Operations: O(n)
 
+    Packages use __slots__ instead of a per-instance __dict__, the weight is stored as an int, the
+    deadline is parsed once, and the address is kept as an integer address ID next to the street,
+    so a full day's manifest takes far less memory.
+
     Methods:
     - __init__(): Constructs all the necessary attributes for the package object.
     - __str__(): Returns a string representation of the package.
-    - Status_update(time_change): Updates the status of the package based on the current time.
     """
+    __slots__ = ("deliveryTime", "departureTime", "ID", "street", "city", "state", "zip", "deadline",
+                 "deadline_time", "weight", "notes", "status", "truckID", "address_id")
 
     def __init__(self, ID, street, city, state, zip, deadline, weight, notes, status='At Hub', departureTime=None,
-                 deliveryTime=None, truckID=None):
+                 deliveryTime=None, truckID=None, address_id=None):
         """
         Constructs all the necessary attributes for the package object.
         """
@@ -202,10 +580,13 @@ class Packages:
         self.state = state
         self.zip = zip
         self.deadline = deadline
+        # Parse the deadline once so routing can compare it with delivery times
+        self.deadline_time = parse_deadline(deadline)
         self.weight = weight
         self.notes = notes
         self.status = status
         self.truckID = truckID
+        self.address_id = address_id
 
     def __str__(self):
         """
@@ -228,209 +609,1020 @@ class Packages:
                 (self.ID, self.street, self.city, self.state, self.zip, self.deadline, self.weight, self.status,
                  self.departureTime, self.deliveryTime))
 
-    def status_update(self, time_change):
+
+def normalize_address(address):
+    """
+    This function normalizes an address so that lookups ignore case and spacing differences.
+
+    Time Complexity: O(m) - where m is the length of the address.
+
+    Parameters:
+    address : The address to be normalized.
+
+    Returns:
+    str : The lowercase address with runs of whitespace collapsed into single spaces.
+    """
+    return " ".join(address.casefold().split())
+
+
+class AddressIndex:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                     ADDRESS INDEX CLASS                                        |
+    |                                  Time Complexity: O(1) - O(n)                                  |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class maps street addresses to their row index in the address list. The index
+                 is built once when the address data is loaded, so resolving an address no longer
+                 scans every row of the address list.
+
+                 Lookups are resolved in two steps:
+                    1. Exact match on the normalized address (see normalize_address).
+                    2. Fallback partial match: the first row, in file order, whose normalized address
+                       contains the normalized query. This is the same rule the original substring
+                       scan used, so partial addresses such as "5383 South 900 East" still resolve.
+                 Fallback results (including misses) are cached, so each distinct partial address
+                 is only scanned once.
+
+    Methods:
+        1. __init__: Builds the index from the rows of the address list.
+        2. lookup: Returns the index of a single address.
+        3. lookup_many: Returns the indices of several addresses.
+
+    Time Complexity:
+        - __init__: O(n).
+        - lookup: O(1) for exact and cached matches, O(n x m) for the first partial match.
+        - lookup_many: O(k) for k cached addresses.
+    """
+
+    def __init__(self, rows):
+        """
+        Constructs the exact-match index and the fallback cache from the address rows.
+
+        Parameters:
+        rows : A list of [index, name, street] rows as read from the address CSV file.
+        """
+        # Keep the normalized street of each row, in file order, for the partial-match fallback
+        self.streets = []
+        # Map each normalized street to its address index
+        self.exact = {}
+        # Cache the results of partial-match lookups
+        self.fallback = {}
+        for row in rows:
+            key = normalize_address(row[2])
+            index = int(row[0])
+            self.streets.append((key, index))
+            # Keep the first row when the same street is listed more than once
+            self.exact.setdefault(key, index)
+
+    def lookup(self, address):
+        """
+        Finds the index of an address.
+
+        Parameters:
+        address : The address to be searched for.
+
+        Returns:
+        The index of the address, or None if no row matches.
+        """
+        key = normalize_address(address)
+        # Try an exact match first
+        index = self.exact.get(key)
+        if index is not None:
+            return index
+        # Fall back to the cached partial match, scanning the rows only the first time
+        if key not in self.fallback:
+            self.fallback[key] = next((i for street, i in self.streets if key in street), None)
+        return self.fallback[key]
+
+    def lookup_many(self, address_list):
+        """
+        Finds the indices of several addresses.
+
+        Parameters:
+        address_list : An iterable of addresses to be searched for.
+
+        Returns:
+        A list of indices in the same order as the input, with None for addresses that are not found.
+        """
+        lookup = self.lookup
+        return [lookup(address) for address in address_list]
+
+
+def package_from_row(row, address_index):
+    """
+    This function creates a package object from one row of the package CSV file. Repeated text is
+    interned so that packages share one copy of each street, city, state, zip code, and deadline.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Parameters:
+    row : The list of fields [ID, street, city, state, zip, deadline, weight, notes].
+    address_index : The AddressIndex used to resolve the package's street to an address ID.
+
+    Returns:
+    Packages : The package object, with its listed address resolved to an address ID.
+    """
+    # Extract the package details from the row
+    pID = int(row[0])
+    pStreet = sys.intern(row[1])
+    pCity = sys.intern(row[2])
+    pState = sys.intern(row[3])
+    pZip = sys.intern(row[4])
+    pDeadline = sys.intern(row[5])
+    pWeight = int(row[6])
+    pNotes = sys.intern(row[7])
+    pStatus = "At the Hub"
+    # Create a Packages object with the extracted details and the ID of its listed address
+    return Packages(pID, pStreet, pCity, pState, pZip, pDeadline, pWeight, pNotes, pStatus,
+                    address_id=address_index.lookup(pStreet))
+
+
+# The number of packages read, validated and inserted at a time when a package file is streamed
+BATCH_SIZE = 1000
+
+
+def open_csv(source):
+    """
+    This function opens a CSV source for reading as text.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Parameters:
+    source : A file name, a file name ending in .gz for a gzip-compressed file, or "-" for standard input.
+
+    Returns:
+    A file object to be used in a with-block. Standard input is not closed when the block ends.
+    """
+    if source == "-":
+        return contextlib.nullcontext(sys.stdin)
+    if str(source).endswith(".gz"):
+        return gzip.open(source, "rt", newline="")
+    return open(source, newline="")
+
+
+def packages_from_rows(rows, address_index, batch_size=BATCH_SIZE, first_line=1):
+    """
+    This function validates rows of package data and turns them into packages, a batch at a time. Only
+    one batch is held in memory, so rows can be streamed from a file of any size.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    rows : An iterable of package rows, without the header row. Blank rows are skipped.
+    address_index : The AddressIndex used to resolve each package's street to an address ID.
+    batch_size : The number of packages in each batch. (default is BATCH_SIZE)
+    first_line : The line number of the first row, used in error messages. (default is 1)
+
+    Yields:
+    A list of at most batch_size Packages objects.
+
+    Raises:
+    ValueError : If a row does not have 8 fields or its ID, weight, or deadline cannot be parsed.
+    """
+    batch = []
+    for line_number, row in enumerate(rows, first_line):
+        if not row:
+            continue
+        try:
+            if len(row) != 8:
+                raise ValueError(f"expected 8 fields, found {len(row)}")
+            package = package_from_row(row, address_index)
+        except ValueError as error:
+            raise ValueError(f"Invalid package on line {line_number}: {error}") from None
+        batch.append(package)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_package_batches(source, address_index, batch_size=BATCH_SIZE):
+    """
+    This function streams validated packages from a package CSV source. The file is read row by row,
+    so memory use is bounded by the batch size however large the file is.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    source : A file name, a gzip-compressed file name ending in .gz, or "-" for standard input.
+    address_index : The AddressIndex used to resolve each package's street to an address ID.
+    batch_size : The number of packages in each batch. (default is BATCH_SIZE)
+
+    Yields:
+    A list of at most batch_size Packages objects.
+    """
+    with open_csv(source) as packages:
+        packageInfo = csv.reader(packages, delimiter=',')
+        first = next(packageInfo, None)
+        # Skip the header row, but keep the first row of a file without one
+        if first and first[0].strip().isdigit():
+            packageInfo = itertools.chain([first], packageInfo)
+            first_line = 1
+        else:
+            first_line = 2
+        yield from packages_from_rows(packageInfo, address_index, batch_size, first_line)
+
+
+def store_packages(batch, dataset=None):
+    """
+    This function bulk-inserts a batch of packages into a dataset's hash table and compiles their notes.
+
+    Time Complexity: O(k) - for k packages.
+
+    Parameters:
+    batch : A list of Packages objects.
+    dataset : The Dataset to add the packages to. (default is None, the default dataset)
+    """
+    if dataset is None:
+        dataset = get_dataset()
+    dataset.packages.insert_many((package.ID, package) for package in batch)
+    add_constraint = dataset.constraints.add
+    for package in batch:
+        add_constraint(package)
+
+
+def ingest_packages(source, dataset=None, batch_size=BATCH_SIZE):
+    """
+    This function streams a package CSV source into a dataset. Each batch is stored before it is
+    yielded, so the caller can start planning with the packages read so far while the rest of the
+    file is still being read.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    source : A file name, a gzip-compressed file name ending in .gz, or "-" for standard input.
+    dataset : The Dataset to add the packages to. (default is None, the default dataset)
+    batch_size : The number of packages in each batch. (default is BATCH_SIZE)
+
+    Yields:
+    A list of at most batch_size Packages objects, already stored in the dataset.
+    """
+    if dataset is None:
+        dataset = get_dataset()
+    for batch in read_package_batches(source, dataset.address_index, batch_size):
+        store_packages(batch, dataset)
+        yield batch
+
+
+def load_package_data(filename, dataset=None, batch_size=BATCH_SIZE):
+    """
+    This function loads package data from a CSV file and stores it in a dataset's hash table.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    filename : The name of the CSV file containing the package data, a .gz file, or "-" for standard input.
+    dataset : The Dataset to add the packages to. (default is None, the default dataset)
+    batch_size : The number of packages read and inserted at a time. (default is BATCH_SIZE)
+
+    Returns:
+    int : The number of packages loaded.
+    """
+    return sum(len(batch) for batch in ingest_packages(filename, dataset, batch_size))
+
+
+def read_csv_rows(filename):
+    """
+    This function reads every row of a CSV file.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    filename : The name of the CSV file, a .gz file, or "-" for standard input.
+
+    Returns:
+    A list of rows, each a list of strings.
+    """
+    with open_csv(filename) as source:
+        return list(csv.reader(source))
+
+
+# The directory holding the bundled CSV files
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+class Dataset:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                        DATASET CLASS                                           |
+    |                                 Time Complexity: O(1) - O(n)                                   |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class holds the data the program works on: the address list and its index, the
+                 distance matrix, and the packages with their compiled constraints. Nothing is read
+                 when a Dataset is created; each part is loaded from its CSV file the first time it is
+                 used, so importing this module, or using only the hash tables or the routing helpers,
+                 never touches the data files. All files are opened with `with` so their handles are
+                 closed once read.
+
+                 When the snapshot cache is on, the address rows and distance matrix are loaded
+                 through snapshot.load_or_build instead: they are memory-mapped from a binary snapshot
+                 in cache_dir, and their CSV files are only parsed again when their contents change.
+                 The package file is always streamed in batches (see load_package_data), with or
+                 without the cache, so a large package file is never held whole in memory or copied
+                 into a snapshot.
+
+                 With shortest_paths set, the distance matrix is replaced by its shortest-path closure
+                 (see paths.shortest_path_closure), which is cached next to the snapshots. Distances
+                 then never exceed a detour through another address, and each path can be listed with
+                 distance_matrix.path(i, j).
+
+                 With candidates set to k, the k nearest addresses of every address are listed once
+                 (see distances.nearest_neighbours), and the nearest-stop search looks at those lists
+                 before every remaining stop. The improvement stage then only tries moves between
+                 stops that are among each other's k nearest stops on the route.
+
+    Attributes:
+    address_file : The path of the address CSV file.
+    distance_file : The path of the distance CSV file.
+    package_file : The path of the package CSV file.
+    corrections : The address corrections passed to the constraint table.
+    cache : True to load the address and distance files through the snapshot cache.
+    cache_dir : The directory holding the snapshots.
+    shortest_paths : True to close the distance matrix under shortest paths.
+    candidates : The number of nearest addresses listed per address, or None for no lists.
+    address_rows : The rows of the address CSV file. (loaded on first use)
+    address_index : The AddressIndex built from the address rows. (loaded on first use)
+    distance_matrix : The DistanceMatrix parsed from the distance file, or its ShortestPaths closure. (loaded
+                      on first use)
+    packages : The ChainingHashTable of packages, keyed by package ID. (loaded on first use)
+    constraints : The ConstraintTable compiled from the package notes. (loaded with the packages)
+    neighbour_lists : The k nearest addresses of every address, or None. (built on first use)
+    """
+
+    def __init__(self, data_dir=None, address_file=None, distance_file=None, package_file=None,
+                 corrections=None, cache=True, cache_dir=None, shortest_paths=False, candidates=None):
+        """
+        Constructs the dataset without reading any files.
+
+        Parameters:
+        data_dir : The directory holding addressCSV.csv, distanceCSV.csv, and packageCSV.csv. (default is
+                   the data directory next to this module)
+        address_file : The path of the address CSV file, overriding data_dir. (default is None)
+        distance_file : The path of the distance CSV file, overriding data_dir. (default is None)
+        package_file : The path of the package CSV file, a .gz file, or "-" for standard input, overriding
+                       data_dir. (default is None)
+        corrections : The address corrections for the constraint table. (default is address_corrections)
+        cache : True to load the address and distance files through the snapshot cache. (default is True)
+        cache_dir : The directory holding the snapshots. (default is .cache inside data_dir)
+        shortest_paths : True to close the distance matrix under shortest paths. (default is False)
+        candidates : The number of nearest addresses listed per address for routing. (default is None, routing
+                     looks at every stop)
+        """
+        data_dir = data_dir or DATA_DIR
+        self.address_file = address_file or os.path.join(data_dir, "addressCSV.csv")
+        self.distance_file = distance_file or os.path.join(data_dir, "distanceCSV.csv")
+        self.package_file = package_file or os.path.join(data_dir, "packageCSV.csv")
+        self.corrections = address_corrections if corrections is None else corrections
+        # The package file is not part of the snapshot, so it may be standard input even with the cache on
+        self.cache = cache
+        self.cache_dir = cache_dir or os.path.join(data_dir, ".cache")
+        self.shortest_paths = shortest_paths
+        self.candidates = candidates
+        self._address_rows = None
+        self._address_index = None
+        self._distance_matrix = None
+        self._packages = None
+        self._constraints = None
+        self._neighbour_lists = None
+
+    def _parse_sources(self):
+        """
+        Parses the address and distance CSV files. Used to build a new snapshot.
+        """
+        return load_distance_matrix(self.distance_file), read_csv_rows(self.address_file)
+
+    def _load_snapshot(self):
+        """
+        Loads the address rows and distance matrix from the snapshot cache.
+        """
+        matrix, self._address_rows = load_or_build(
+            self.cache_dir, (self.address_file, self.distance_file), self._parse_sources)
+        self._distance_matrix = self._close(matrix)
+
+    def _close(self, matrix):
+        """
+        Returns the distance matrix, or its shortest-path closure when shortest_paths is set.
+        """
+        if not self.shortest_paths:
+            return matrix
+        if self.cache:
+            return load_or_build_closure(self.cache_dir, (self.distance_file,), matrix)
+        return shortest_path_closure(matrix)
+
+    @property
+    def address_rows(self):
+        """
+        Returns the rows of the address CSV file, reading the file on first use.
+        """
+        if self._address_rows is None:
+            if self.cache:
+                self._load_snapshot()
+            else:
+                self._address_rows = read_csv_rows(self.address_file)
+        return self._address_rows
+
+    @property
+    def address_index(self):
+        """
+        Returns the AddressIndex, building it on first use.
+        """
+        if self._address_index is None:
+            self._address_index = AddressIndex(self.address_rows)
+        return self._address_index
+
+    @property
+    def distance_matrix(self):
+        """
+        Returns the DistanceMatrix, parsing the distance file on first use.
+        """
+        if self._distance_matrix is None:
+            if self.cache:
+                self._load_snapshot()
+            else:
+                self._distance_matrix = self._close(load_distance_matrix(self.distance_file))
+        return self._distance_matrix
+
+    @property
+    def neighbour_lists(self):
+        """
+        Returns the neighbour lists of the distance matrix, building them on first use, or None if
+        candidates is not set.
+        """
+        if self._neighbour_lists is None and self.candidates:
+            self._neighbour_lists = nearest_neighbours(self.distance_matrix, self.candidates)
+        return self._neighbour_lists
+
+    @property
+    def packages(self):
+        """
+        Returns the hash table of packages, loading the package file on first use.
+        """
+        if self._packages is None:
+            # Create the empty table and constraints first so the packages can be stored in them
+            self._packages = ChainingHashTable()
+            self._constraints = ConstraintTable(self.corrections)
+            try:
+                # Stream the package file in batches instead of reading it whole
+                load_package_data(self.package_file, self)
+            except Exception:
+                self._packages = self._constraints = None
+                raise
+        return self._packages
+
+    @property
+    def constraints(self):
+        """
+        Returns the ConstraintTable, loading the package file on first use.
+        """
+        if self._constraints is None:
+            self.packages
+        return self._constraints
+
+
+# The dataset used when no dataset is passed explicitly. It is created on first use.
+_default_dataset = None
+
+
+def load(data_dir=None, address_file=None, distance_file=None, package_file=None, corrections=None, cache=True,
+         cache_dir=None, shortest_paths=False, candidates=None):
+    """
+    This function creates a Dataset and makes it the default dataset used by the rest of the module.
+    The files are read lazily, the first time each part of the dataset is used.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Parameters:
+    See Dataset.__init__.
+
+    Returns:
+    Dataset : The new default dataset.
+    """
+    global _default_dataset
+    _default_dataset = Dataset(data_dir, address_file, distance_file, package_file, corrections, cache, cache_dir,
+                               shortest_paths, candidates)
+    return _default_dataset
+
+
+def get_dataset():
+    """
+    This function returns the default dataset, creating it from the bundled data directory on first use.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Returns:
+    Dataset : The default dataset.
+    """
+    if _default_dataset is None:
+        return load()
+    return _default_dataset
+
+
+# Names that used to be module globals, now read from the default dataset when they are first used
+_DATASET_ATTRIBUTES = {
+    'packageHash': 'packages',
+    'packageConstraints': 'constraints',
+    'addressIndex': 'address_index',
+    'distanceMatrix': 'distance_matrix',
+    'address_csv': 'address_rows',
+}
+
+
+def __getattr__(name):
+    """
+    Resolves the former module globals (packageHash, distanceMatrix, ...) from the default dataset.
+    """
+    if name in _DATASET_ATTRIBUTES:
+        return getattr(get_dataset(), _DATASET_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class Trucks:
+    """
+    A class used to represent a Truck.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Attributes:
+    speed : The speed of the truck in miles per hour.
+    miles : The total miles that the truck has traveled.
+    current_location : The current location of the truck.
+    time : The current time for the truck.
+    depart_time : The departure time of the truck from the hub.
+    packages : The list of package IDs that the truck is carrying.
+    miles_saved : The miles the route improvement stage saved over the greedy route.
+
+    Methods:
+    __init__(self, speed, miles, currentLocation, departTime, packages):
+        Constructs all the necessary attributes for the truck object.
+    """
+    __slots__ = ("speed", "miles", "current_location", "time", "depart_time", "packages", "miles_saved")
+
+    def __init__(self, speed, miles, currentLocation, departTime, packages):
+        """
+        Constructs all the necessary attributes for the truck object.
+        """
+        self.speed = speed
+        self.miles = miles
+        self.current_location = currentLocation
+        self.time = departTime
+        self.depart_time = departTime
+        self.packages = packages
+        self.miles_saved = 0.0
+
+
+def assign_packages_to_truck(truck, truck_id, dataset=None):
+    """
+    This function assigns a truck ID to each package loaded on the truck.
+    It also updates the package in the hash table to reflect the new truck ID assignment.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    truck : The truck object that is delivering the packages.
+    truck_id : The ID of the truck.
+    dataset : The Dataset holding the packages. (default is None, the default dataset)
+    """
+    packageHash = (dataset or get_dataset()).packages
+    # Iterate over each package in the truck's packages
+    for package_id in truck.packages:
+        # Search for the package in the hash table using the package ID
+        package = packageHash.search(package_id)
+        # If the package is found, assign the truck ID to the package
+        if package:
+            package.truckID = truck_id  # Assign the truck ID to the package
+            # Update the package in the hash table to reflect the new truck ID assignment
+            packageHash.insert(package_id, package)
+
+
+def addresses(address, dataset=None):
+    """
+    This function finds the index of a given address using the dataset's address index.
+
+    Time Complexity: O(1) for exact and repeated matches, O(n x m) for the first partial match
+
+    Parameters:
+    address : The address to be searched for in the address index.
+    dataset : The Dataset holding the address index. (default is None, the default dataset)
+
+    Returns:
+    The index of the address in the address list. If the address is not found, it returns None.
+    """
+    # Delegate to the address index built at load time
+    return (dataset or get_dataset()).address_index.lookup(address)
+
+
+def addresses_many(address_list, dataset=None):
+    """
+    This function finds the indices of several addresses in one call.
+
+    Time Complexity: O(k) for k addresses with exact matches
+
+    Parameters:
+    address_list : An iterable of addresses to be searched for.
+    dataset : The Dataset holding the address index. (default is None, the default dataset)
+
+    Returns:
+    A list of address indices in the same order as the input. Addresses that are not found map to None.
+    """
+    return (dataset or get_dataset()).address_index.lookup_many(address_list)
+
+
+def distance_between(addy1, addy2, dataset=None):
+    """
+    This function returns the distance between two addresses based on the address IDs. The
+    distances are parsed once into the dataset's DistanceMatrix when the data is loaded, so the
+    lookup is a single read from a block of floats.
+
+    Time Complexity: O(1)
+
+    Parameters:
+    addy1 : The index of the first address in the distance matrix.
+    addy2 : The index of the second address in the distance matrix.
+    dataset : The Dataset holding the distance matrix. (default is None, the default dataset)
+
+    Returns:
+    float : The distance between the two addresses.
+    """
+    return (dataset or get_dataset()).distance_matrix.d(addy1, addy2)
+
+
+class Stop:
+    """
+    A class used to represent a delivery stop: one address and the packages delivered there.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Attributes:
+    address_id : The index of the stop's address in the address list and distance matrix.
+    street : The street address of the stop, as listed on its first package.
+    packages : The list of package objects delivered at the stop, in loading order.
+    deadline : The earliest deadline of the stop's packages, or None if none of them has one.
+    """
+
+    def __init__(self, address_id, street):
+        """
+        Constructs all the necessary attributes for the stop object.
+        """
+        self.address_id = address_id
+        self.street = street
+        self.packages = []
+        self.deadline = None
+
+    def add(self, package):
         """
-        This method updates the status of a package based on the current time.
+        Adds a package to the stop and tightens the stop's deadline if needed.
 
         Parameters:
-        time_change : The current time.
-        """
-        # If the delivery time of the package is None, set the status to "At the hub"
-        if self.deliveryTime is None:
-            self.status = "At the hub"
-        # If the current time is before the departure time of the package, set the status to "At the hub"
-        elif time_change < self.departureTime:
-            self.status = "At the hub"
-        # If the current time is before the delivery time of the package, set the status to "En route"
-        elif time_change < self.deliveryTime:
-            self.status = "En route"
-        # If the current time is after the delivery time of the package, set the status to "Delivered"
-        else:
-            self.status = "Delivered"
-        # If the package ID is 9, update the street and zip code based on the current time
-        if self.ID == 9:
-            if time_change > datetime.timedelta(hours=10, minutes=20):
-                self.street = "410 S State St"
-                self.zip = "84111"
-            else:
-                self.street = "300 State St"
-                self.zip = "84103"
-
-
-# Load CSV data
-# AddressCSV is a list of lists where each sublist represents a row in the CSV file
-address_csv = list(csv.reader(open("./data/addressCSV.csv")))
-# DistanceCSV is a list of lists where each sublist represents a row in the CSV file
-distance_csv = list(csv.reader(open("./data/distanceCSV.csv")))
+        package : The package object delivered at the stop.
+        """
+        self.packages.append(package)
+        if package.deadline_time is not None and (self.deadline is None or package.deadline_time < self.deadline):
+            self.deadline = package.deadline_time
 
 
-def load_package_data(filename):
+def group_packages_by_stop(package_list, time=None, dataset=None):
     """
-    This function loads package data from a CSV file and stores it in a hash table.
+    This function groups packages by their resolved address index, so that packages sharing an
+    address are delivered in a single visit. Stops are returned in the order their first package
+    appears in the input.
 
     Time Complexity: O(n)
 
     Parameters:
-    filename : The name of the CSV file containing the package data.
+    package_list : A list of package objects.
+    time : The time the route starts. Packages whose address has been corrected by then are grouped
+           by their corrected address. (default is None, use the listed addresses)
+    dataset : The Dataset holding the addresses and constraints. (default is None, the default dataset)
+
+    Returns:
+    A list of Stop objects.
+
+    Raises:
+    ValueError : If a package's street is not in the address list.
     """
-    # Open the CSV file
-    with open(filename) as packages:
-        # Create a CSV reader object
-        packageInfo = csv.reader(packages, delimiter=',')
-        # Skip the header row
-        next(packageInfo)
-        # Iterate over each row in the CSV file
-        for package in packageInfo:
-            # Extract the package details from the row
-            pID = int(package[0])
-            pStreet = package[1]
-            pCity = package[2]
-            pState = package[3]
-            pZip = package[4]
-            pDeadline = package[5]
-            pWeight = package[6]
-            pNotes = package[7]
-            pStatus = "At the Hub"
-            # Create a Packages object with the extracted details
-            p = Packages(pID, pStreet, pCity, pState, pZip, pDeadline, pWeight, pNotes, pStatus)
-            # Insert the Packages an object into the hash table
-            packageHash.insert(pID, p)
-
-
-# Load package data
-load_package_data('./data/packageCSV.csv')
+    dataset = dataset or get_dataset()
+    packageConstraints = dataset.constraints
+    stops = {}
+    for package in package_list:
+        # Use the address resolved at load time unless the package's address has been corrected
+        street, address_id = package.street, package.address_id
+        if time is not None and packageConstraints.address_change(package.ID) is not None:
+            street = packageConstraints.street_at(package, time)[0]
+            address_id = addresses(street, dataset)
+        elif address_id is None:
+            address_id = addresses(street, dataset)
+        if address_id is None:
+            raise ValueError(f"Package {package.ID} has an unknown address: {street}")
+        # Create the stop the first time its address is seen
+        if address_id not in stops:
+            stops[address_id] = Stop(address_id, street)
+        stops[address_id].add(package)
+    return list(stops.values())
+
+
+def nearest_neighbour_route(stops, location, dataset=None):
+    """
+    This function orders the stops of a route with the greedy nearest-neighbour rule. Stops holding
+    package 25 or 6 are visited first, then the nearest unvisited stop is taken each step.
 
+    Time Complexity: O(n^2) vectorized
 
-class Trucks:
+    Parameters:
+    stops : The list of Stop objects to visit.
+    location : The address index the route leaves from.
+    dataset : The Dataset holding the distance matrix. (default is None, the default dataset)
+
+    Returns:
+    A list of stop positions in the order they are visited.
     """
-    A class used to represent a Truck.
+    dataset = dataset or get_dataset()
+    # Mask visited stops instead of removing them from a list
+    unvisited = UnvisitedStops(dataset.distance_matrix, [stop.address_id for stop in stops], dataset.neighbour_lists)
+    # Positions of the stops that must be visited first, in the loading order of their packages
+    priority = [i for i, stop in enumerate(stops) if any(package.ID in [25, 6] for package in stop.packages)]
+    order = []
+
+    # While there are stops left to visit, pick the next stop
+    while len(unvisited) > 0:
+        # Visit the first unvisited priority stop, otherwise the nearest stop
+        candidate = next((i for i in priority if not unvisited.is_visited(i)), None)
+        if candidate is None:
+            candidate, _ = unvisited.nearest(location)
+        unvisited.visit(candidate)
+        order.append(candidate)
+        location = stops[candidate].address_id
+    return order
+
+
+def missed_deadlines(pending, deadlines, address_ids, location, now, speed, matrix):
+    """
+    This function plays out a visit of the stops with a deadline from where the truck is, and counts the
+    deadlines it misses. The slack of a stop is its deadline minus the time the truck would reach it from
+    its current position, and it is worked out again after every move: each move goes to the nearest stop
+    whose slack is not negative, or to the stop with the least slack once every stop is going to be late.
 
-    Time Complexity: O(1) - Constant time complexity.
+    Time Complexity: O(k^2) - for k stops with a deadline.
 
-    Attributes:
+    Parameters:
+    pending : The set of positions of the stops with a deadline that have not been visited. It is not changed.
+    deadlines : A dictionary mapping each position in pending to its deadline, in hours after midnight.
+    address_ids : The address index of every stop position.
+    location : The address index the truck is at.
+    now : The current time, in hours after midnight.
     speed : The speed of the truck in miles per hour.
-    miles : The total miles that the truck has traveled.
-    current_location : The current location of the truck.
-    time : The current time for the truck.
-    depart_time : The departure time of the truck from the hub.
-    packages : The list of package IDs that the truck is carrying.
+    matrix : The DistanceMatrix.
 
-    Methods:
-    __init__(self, speed, miles, currentLocation, departTime, packages):
-        Constructs all the necessary attributes for the truck object.
+    Returns:
+    A tuple (first, misses): the position of the stop visited first, or None if pending is empty, and the
+    number of stops that miss their deadline.
+    """
+    pending = set(pending)
+    first = None
+    misses = 0
+    while pending:
+        # Work out the slack of every pending stop from the truck's current position
+        slacks = []
+        for i in pending:
+            distance = matrix.d(location, address_ids[i])
+            slacks.append((deadlines[i] - now - distance / speed, distance, i))
+        on_time = [(distance, slack, i) for slack, distance, i in slacks if slack >= 0]
+        if on_time:
+            distance, slack, i = min(on_time)
+        else:
+            slack, distance, i = min(slacks)
+            misses += 1
+        if first is None:
+            first = i
+        now += distance / speed
+        location = address_ids[i]
+        pending.discard(i)
+    return first, misses
+
+
+def deadline_aware_route(stops, location, depart_time, speed, dataset=None):
     """
+    ,------------------------------------------------------------------------------------------------,
+    |                                 DEADLINE-AWARE ROUTE FUNCTION                                  |
+    |                          Time Complexity: O(n k^2) + O(n^2) vectorized                         |
+    '------------------------------------------------------------------------------------------------'
 
-    def __init__(self, speed, miles, currentLocation, departTime, packages):
-        """
-        Constructs all the necessary attributes for the truck object.
-        """
-        self.speed = speed
-        self.miles = miles
-        self.current_location = currentLocation
-        self.time = departTime
-        self.depart_time = departTime
-        self.packages = packages
+    Description: This function orders the stops of a route using the parsed package deadlines instead
+                 of hard-coded package IDs. Each step takes the nearest unvisited stop, unless driving
+                 there first would make more of the stops with a deadline late. To tell, the visit of
+                 those stops is played out twice (see missed_deadlines), once from the truck's current
+                 position and once from the nearest stop: their slack (deadline minus arrival time) is
+                 worked out again after every move, so it always reflects where the truck is. If the
+                 nearest stop costs a deadline, the first stop of the visit from the current position is
+                 taken instead.
+
+                 There is no priority queue of stops keyed on slack: slack depends on where the truck
+                 is, so every key changes after each move and a heap would have to be rebuilt anyway.
+                 A step therefore costs O(k^2) for the k stops with a deadline left, rather than the
+                 O(log n) of a heap keyed on the deadline alone, on top of the nearest-stop argmin. The
+                 stops with a deadline are few on a truck, and the deadlines are worked in hours so
+                 the replays only do float arithmetic.
 
+    Parameters:
+    stops : The list of Stop objects to visit.
+    location : The address index the route leaves from.
+    depart_time : The time the truck leaves, as a datetime.timedelta.
+    speed : The speed of the truck in miles per hour.
+    dataset : The Dataset holding the distance matrix. (default is None, the default dataset)
 
-def assign_packages_to_truck(truck, truck_id):
+    Returns:
+    A list of stop positions in the order they are visited.
     """
-    This function assigns a truck ID to each package loaded on the truck.
-    It also updates the package in the hash table to reflect the new truck ID assignment.
+    dataset = dataset or get_dataset()
+    matrix = dataset.distance_matrix
+    address_ids = [stop.address_id for stop in stops]
+    # Mask visited stops instead of removing them from a list
+    unvisited = UnvisitedStops(matrix, address_ids, dataset.neighbour_lists)
+    # The deadlines, in hours, of the stops that have one; visited stops are taken out of urgent
+    deadlines = {i: stop.deadline.total_seconds() / 3600 for i, stop in enumerate(stops) if stop.deadline is not None}
+    urgent = set(deadlines)
+    now = depart_time.total_seconds() / 3600
+    order = []
+
+    # While there are stops left to visit, pick the next stop
+    while len(unvisited) > 0:
+        candidate, distance = unvisited.nearest(location)
+        if urgent:
+            # Count the deadlines missed from here, and after driving to the nearest stop first
+            most_urgent, misses = missed_deadlines(urgent, deadlines, address_ids, location, now, speed, matrix)
+            arrival = now + distance / speed
+            was_urgent = candidate in urgent
+            urgent.discard(candidate)
+            misses_after = missed_deadlines(urgent, deadlines, address_ids, address_ids[candidate], arrival, speed,
+                                            matrix)[1]
+            if was_urgent and arrival > deadlines[candidate]:
+                misses_after += 1
+            # Take the nearest stop only if it does not cost a deadline
+            if misses_after > misses:
+                if was_urgent:
+                    urgent.add(candidate)
+                candidate = most_urgent
+                distance = matrix.d(location, address_ids[candidate])
+                urgent.discard(candidate)
+        unvisited.visit(candidate)
+        order.append(candidate)
+        now += distance / speed
+        location = address_ids[candidate]
+    return order
+
+
+def load_stops(truck, dataset=None):
+    """
+    This function moves all packages from a truck into the stops they will be delivered at. The truck's
+    package list is emptied; drive_route fills it again in delivery order.
 
     Time Complexity: O(n)
 
     Parameters:
     truck : The truck object that is delivering the packages.
-    truck_id : The ID of the truck.
+    dataset : The Dataset holding the packages. (default is None, the default dataset)
+
+    Returns:
+    A list of Stop objects.
     """
-    # Iterate over each package in the truck's packages
-    for package_id in truck.packages:
-        # Search for the package in the hash table using the package ID
-        package = packageHash.search(package_id)
-        # If the package is found, assign the truck ID to the package
-        if package:
-            package.truckID = truck_id  # Assign the truck ID to the package
-            # Update the package in the hash table to reflect the new truck ID assignment
-            packageHash.insert(package_id, package)
+    dataset = dataset or get_dataset()
+    packageHash = dataset.packages
+    in_transit = [packageHash.search(packageID) for packageID in truck.packages]
+    stops = group_packages_by_stop(in_transit, truck.time, dataset)
+    truck.packages.clear()
+    return stops
 
 
-def addresses(address):
+def route_stops(stops, location, hub, depart_time, speed, mode="greedy", improve=False, time_budget=0.05,
+                max_iterations=1000, dataset=None):
     """
-    This function finds the index of a given address in a global 2D list.
+    This function orders the stops of a route. It only reads the distance matrix and the stops, so
+    routes for different trucks can be built at the same time.
 
-    Time Complexity: O(1) Best Case, O(n x m) Worst Case
+    Time Complexity: O(n^2) vectorized, plus the improvement stage's time budget.
 
     Parameters:
-    address : The address to be searched for in the global 2D list.
+    stops : The list of Stop objects to visit.
+    location : The address index the route leaves from.
+    hub : The address index the route finishes at.
+    depart_time : The departure time, as a datetime.timedelta.
+    speed : The speed of the truck in miles per hour.
+    mode : "greedy" for the nearest-neighbour route with priority packages 25 and 6, or "deadline" for
+           the route driven by the packages' deadlines. (default is "greedy")
+    improve : If True, run the local-search improvement stage on the route. (default is False)
+    time_budget : The maximum number of seconds the improvement stage may run for. (default is 0.05)
+    max_iterations : The maximum number of moves the improvement stage may apply. (default is 1000)
+    dataset : The Dataset holding the distance matrix. (default is None, the default dataset)
 
     Returns:
-    The index of the address in the global 2D list. If the address is not found, it returns None.
-    """
-    # Iterate over each row in the global 2D list
-    for row in address_csv:
-        # If the address is found in the row, return its index
-        if address in row[2]:
-            return int(row[0])
-    # If the address is not found in any row, the function returns None
-    return None
+    A tuple (order, miles_saved) with the stop positions in the order they are visited and the miles
+    the improvement stage saved (0.0 without it).
 
-
-def distance_between(addy1, addy2):
+    Raises:
+    ValueError : If the routing mode is unknown.
+    """
+    dataset = dataset or get_dataset()
+    # Build the greedy route, then optionally improve it
+    if mode == "deadline":
+        order = deadline_aware_route(stops, location, depart_time, speed, dataset)
+    elif mode == "greedy":
+        order = nearest_neighbour_route(stops, location, dataset)
+    else:
+        raise ValueError(f"Unknown routing mode: {mode}")
+    miles_saved = 0.0
+    if improve:
+        # Each stop must be reached by the earliest deadline of the packages delivered there
+        deadlines = [stop.deadline.total_seconds() if stop.deadline is not None else None for stop in stops]
+        # Restrict the moves to each stop's nearest stops on this route
+        neighbours = nearest_neighbours(dataset.distance_matrix, dataset.candidates,
+                                        [location, hub] + [stop.address_id for stop in stops]) \
+            if dataset.candidates else None
+        order, miles_saved = improve_route(dataset.distance_matrix, location, [stop.address_id for stop in stops],
+                                           order, end=hub, speed=speed, depart_seconds=depart_time.total_seconds(),
+                                           deadlines=deadlines, time_budget=time_budget,
+                                           max_iterations=max_iterations, neighbours=neighbours)
+    return order, miles_saved
+
+
+def reroute(truck, route, from_stop, changes=(), mode="greedy", improve=False, time_budget=0.05, max_iterations=1000,
+            dataset=None):
     """
-    This function calculates the distance between two addresses based on the address IDs. It
-    retrieves the distance from the distanceCSV list using the address IDs as indices. If the
-    distance is empty, it retrieves the distance from the reverse direction. It returns the
-    distance as a float.
+    This function re-plans the part of a route a truck has not driven yet, after packages were added to the
+    truck or had their address corrected. The stops already driven are kept as they are; the packages of
+    the remaining stops and the changed packages are grouped into stops again at the addresses they have at
+    the truck's time (see group_packages_by_stop: an address correction in the constraint table is applied
+    once its time has passed, whether or not the caller has updated the package) and ordered from the
+    truck's position (see route_stops), so only the suffix is re-optimized and the distances come from the
+    loaded distance matrix. Passing no changes re-plans the suffix from the truck's current time, e.g.
+    after a delay.
 
-    Time Complexity: O(1)
-    This function calculates the distance between two addresses based on their indices in a global 2D list.
+    Time Complexity: O(k^2) - for the k stops not driven yet, plus the improvement stage's time budget.
 
     Parameters:
-    addy1 : The index of the first address in the global 2D list.
-    addy2 : The index of the second address in the global 2D list.
+    truck : The truck object driving the route. Its time is when the new suffix starts; it is not changed.
+    route : The list of Stop objects of the route, in the order they are visited.
+    from_stop : The number of stops already driven; the truck is at the last of them, or at its current
+                location if none.
+    changes : The IDs of the packages added to the truck or whose address changed. Packages delivered at
+              the driven stops are skipped. (default is no changes)
+    mode : The routing mode (see route_stops). (default is "greedy")
+    improve : If True, run the local-search improvement stage on the new suffix. (default is False)
+    time_budget : The maximum number of seconds the improvement stage may run for. (default is 0.05)
+    max_iterations : The maximum number of moves the improvement stage may apply. (default is 1000)
+    dataset : The Dataset holding the packages and distances. (default is None, the default dataset)
 
     Returns:
-    float : The distance between the two addresses. If the distance is not found in the global 2D list, it returns 0.0.
-    """
-
-    # Try to get the distance from the global 2D list using addy1 and addy2 as indices
-    distance = distance_csv[addy1][addy2]
+    A new list of Stop objects: the driven stops, then the re-planned stops.
 
-    # If the distance is not found (i.e., if the corresponding element in DistanceCSV is an empty string),
-    # try to get the distance using addy2 and addy1 as indices
-    if distance == '':
-        distance = distance_csv[addy2][addy1]
+    Raises:
+    ValueError : If a changed package is unknown or has an unknown address.
+    """
+    dataset = dataset or get_dataset()
+    packageHash = dataset.packages
+    driven = route[:from_stop]
+    location = driven[-1].address_id if driven else addresses(truck.current_location, dataset)
+
+    # Collect the packages still to deliver, taking the changed ones out of their old stops
+    delivered = {package.ID for stop in driven for package in stop.packages}
+    changed = [packageID for packageID in dict.fromkeys(changes) if packageID not in delivered]
+    pending = [package for stop in route[from_stop:] for package in stop.packages if package.ID not in changed]
+    for packageID in changed:
+        package = packageHash.search(packageID)
+        if package is None:
+            raise ValueError(f"Unknown package {packageID}")
+        pending.append(package)
 
-    # Return the distance as a float
-    return float(distance)
+    # Group by the address each package has at the truck's time, so corrections made by then are applied
+    stops = group_packages_by_stop(pending, truck.time, dataset)
+    order = route_stops(stops, location, addresses("4001 South 700 East", dataset), truck.time, truck.speed, mode,
+                        improve, time_budget, max_iterations, dataset)[0]
+    return driven + [stops[candidate] for candidate in order]
 
 
-def truck_deliver_packages(truck, truck_num):
+def drive_route(truck, truck_num, stops, order, improve=False, dataset=None):
     """
-    ,------------------------------------------------------------------------------------------------,
-    |                                TRUCK DELIVERY ALGORITHM FUNCTION                               |
-    |                                     Time Complexity: O(n^2)                                    |
-    '------------------------------------------------------------------------------------------------'
+    This function drives a truck along a route, delivering every package at a stop together, then
+    returns the truck to the hub. It updates the truck and the delivery times of its packages.
 
-    Description: This function simulates the delivery process for a truck. It takes a truck object and
-                    truck number as input. It initializes an empty list for en route packages and an
-                    empty list for status logs. It adds the packages from the truck object to the in_transit
-                    list. It then enters a loop until all packages are delivered. In each iteration, it
-                    finds the next package to deliver based on the current location and the distance to
-                    each package's street address. It updates the status logs and truck attributes
-                    accordingly. Once all packages are delivered, it calculates the distance to return to
-                    the hub and updates the status logs and truck attributes. It returns the status logs.
+    Time Complexity: O(n)
 
     Parameters:
     truck : The truck object that is delivering the packages.
     truck_num : The number of the truck.
+    stops : The list of Stop objects, from load_stops.
+    order : The stop positions in the order they are visited, from route_stops.
+    improve : If True, add the miles saved by the improvement stage to the logs. (default is False)
+    dataset : The Dataset holding the distances. (default is None, the default dataset)
 
     Returns:
     A list of status logs for the truck.
     """
-
-    # Initialize a list to hold the packages that are in transit
-    in_transit = []
+    dataset = dataset or get_dataset()
+    distanceMatrix = dataset.distance_matrix
+    location = addresses(truck.current_location, dataset)
+    hub = addresses("4001 South 700 East", dataset)
 
     # Initialize a list to hold the status logs for the truck
     status_logs = []
@@ -439,24 +1631,10 @@ def truck_deliver_packages(truck, truck_num):
     header = f"{Colors.BOLD}{Colors.LIGHT_ORANGE}Truck\tStatus\t\tTime\t\t\t\tMiles\t\tAddress or Package #{Colors.END}"
     status_logs.append(header)
 
-    # Move all packages from the truck to the in_transit list
-    for packageID in truck.packages:
-        package = packageHash.search(packageID)
-        in_transit.append(package)
-    truck.packages.clear()
-
-    # While there are packages in transit, deliver the packages
-    while len(in_transit) > 0:
-        nextAddy = 2000
-        nextPackage = None
-        for package in in_transit:
-            if package.ID in [25, 6]:
-                nextPackage = package
-                nextAddy = distance_between(addresses(truck.current_location), addresses(package.street))
-                break
-            if distance_between(addresses(truck.current_location), addresses(package.street)) <= nextAddy:
-                nextAddy = distance_between(addresses(truck.current_location), addresses(package.street))
-                nextPackage = package
+    # Drive the route, visiting the stops in order
+    for candidate in order:
+        nextStop = stops[candidate]
+        nextAddy = distanceMatrix.d(location, nextStop.address_id)
 
         # Calculate the time and log the status when the truck stops at the delivery location
         hours = int(truck.time.total_seconds() // 3600)
@@ -465,29 +1643,34 @@ def truck_deliver_packages(truck, truck_num):
         time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
         statusStops = (f"  {Colors.BOLD}{Colors.BRIGHT_WHITE}{truck_num}{Colors.YELLOW}  \tStopped"
                        f"{Colors.END}  \t{Colors.BOLD}{time_str:<20}{Colors.END}"
-                       f"{truck.miles:<10.1f}  {nextPackage.street:<30}{Colors.END}")
+                       f"{truck.miles:<10.1f}  {nextStop.street:<30}{Colors.END}")
         status_logs.append(statusStops)
 
-        # Deliver the package and update the truck's location, time, and miles
-        truck.packages.append(nextPackage.ID)
-        in_transit.remove(nextPackage)
+        # Drive to the stop and update the truck's location, time, and miles
         truck.miles += nextAddy
-        truck.current_location = nextPackage.street
-        truck.time += datetime.timedelta(hours=nextAddy / 18)
-        nextPackage.deliveryTime = truck.time
-        nextPackage.departureTime = truck.depart_time
-
-        # Log the status when the package is delivered
+        truck.current_location = nextStop.street
+        location = nextStop.address_id
+        truck.time += datetime.timedelta(hours=nextAddy / truck.speed)
+
+        # Deliver every package at the stop at once
+        for package in nextStop.packages:
+            truck.packages.append(package.ID)
+            package.deliveryTime = truck.time
+            package.departureTime = truck.depart_time
+
+        # Log the status when the packages are delivered
+        package_ids = ", ".join(str(package.ID) for package in nextStop.packages)
+        label = "Package" if len(nextStop.packages) == 1 else "Packages"
         statusDelivered = (f"  {Colors.BOLD}{Colors.BRIGHT_WHITE}{truck_num}{Colors.END}  "
                            f"\t{Colors.GREEN}{Colors.BOLD}Delivered{Colors.END}  "
                            f"\t{Colors.BOLD}{time_str:<20}{Colors.END}"
-                           f"\t\t\tPackage {nextPackage.ID:<10}{Colors.END}")
+                           f"\t\t\t{label} {package_ids:<10}{Colors.END}")
         status_logs.append(statusDelivered)
 
     # Calculate the return distance and time, and update the truck's miles and time
-    return_distance = distance_between(addresses(truck.current_location), addresses("4001 South 700 East"))
+    return_distance = distanceMatrix.d(location, hub)
     truck.miles += return_distance
-    truck.time += datetime.timedelta(hours=return_distance / 18)
+    truck.time += datetime.timedelta(hours=return_distance / truck.speed)
 
     # Calculate the time and log the status when the truck arrives back at the hub
     hours = int(truck.time.total_seconds() // 3600)
@@ -499,10 +1682,144 @@ def truck_deliver_packages(truck, truck_num):
                  f"{truck.miles:<10.1f}  4001 South 700 East (hub){Colors.END}\n\n\n")
     status_logs.append(statusHub)
 
+    # Report how much the improvement stage saved over the greedy route
+    if improve:
+        status_logs.append(f"  {Colors.BOLD}{Colors.BRIGHT_WHITE}{truck_num}{Colors.END}  \tRoute improvement saved "
+                           f"{Colors.BOLD}{truck.miles_saved:.1f} miles{Colors.END} over the greedy route\n\n\n")
+
     # Return the status logs for the truck
     return status_logs
 
 
+def truck_deliver_packages(truck, truck_num, mode="greedy", improve=False, time_budget=0.05, max_iterations=1000,
+                           dataset=None):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                TRUCK DELIVERY ALGORITHM FUNCTION                               |
+    |                              Time Complexity: O(n^2) vectorized                                |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function simulates the delivery process for a truck. It takes a truck object and
+                    truck number as input. It groups the packages from the truck object into stops, one
+                    per delivery address (see load_stops). It orders the stops with the greedy
+                    nearest-neighbour rule (see nearest_neighbour_route) or, in "deadline" mode, with the
+                    deadline-aware rule (see deadline_aware_route) and, when improve is set, shortens that
+                    route with 2-opt and Or-opt moves that keep every deadline met (see route_stops). It
+                    then drives the route, delivering every package at a stop together, and returns to
+                    the hub, updating the status logs and truck attributes (see drive_route). It returns
+                    the status logs.
+
+    Parameters:
+    truck : The truck object that is delivering the packages.
+    truck_num : The number of the truck.
+    mode : "greedy" for the nearest-neighbour route with priority packages 25 and 6, or "deadline" for
+           the route driven by the packages' deadlines. (default is "greedy")
+    improve : If True, run the local-search improvement stage on the greedy route. (default is False)
+    time_budget : The maximum number of seconds the improvement stage may run for. (default is 0.05)
+    max_iterations : The maximum number of moves the improvement stage may apply. (default is 1000)
+    dataset : The Dataset holding the packages and distances. (default is None, the default dataset)
+
+    Returns:
+    A list of status logs for the truck.
+    """
+    dataset = dataset or get_dataset()
+    stops = load_stops(truck, dataset)
+    order, truck.miles_saved = route_stops(stops, addresses(truck.current_location, dataset),
+                                           addresses("4001 South 700 East", dataset), truck.time, truck.speed,
+                                           mode, improve, time_budget, max_iterations, dataset)
+    return drive_route(truck, truck_num, stops, order, improve, dataset)
+
+
+# The datasets opened by route worker processes, keyed by their source files, so each worker loads them once
+_worker_datasets = {}
+
+
+def _route_in_worker(sources, stops, location, hub, depart_time, speed, mode, improve, time_budget, max_iterations):
+    """
+    Builds one route in a worker process (see route_stops). The worker opens the dataset itself, through
+    the snapshot cache, instead of receiving the distance matrix from the parent process.
+    """
+    dataset = _worker_datasets.get(sources)
+    if dataset is None:
+        address_file, distance_file, package_file, cache, cache_dir, shortest_paths, candidates = sources
+        dataset = _worker_datasets[sources] = Dataset(address_file=address_file, distance_file=distance_file,
+                                                      package_file=package_file, cache=cache, cache_dir=cache_dir,
+                                                      shortest_paths=shortest_paths, candidates=candidates)
+    return route_stops(stops, location, hub, depart_time, speed, mode, improve, time_budget, max_iterations, dataset)
+
+
+def deliver_trucks(trucks, dependencies=None, release=None, mode="greedy", improve=False, time_budget=0.05,
+                   max_iterations=1000, workers=None, dataset=None):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                 FLEET DELIVERY FUNCTION                                        |
+    |                         Time Complexity: O(n^2) per truck, run in parallel                     |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function delivers the packages of several trucks, building the routes of
+                 independent trucks at the same time. Building a route (see route_stops) only reads
+                 the distance matrix, so it runs in a pool of worker processes; loading the stops and
+                 driving the route (see load_stops and drive_route) update the packages, so they run
+                 in this process as each route comes back.
+
+                 dependencies says which trucks must be back before another truck's route is built,
+                 e.g. {1: [0]} when truck 2's driver is the one bringing truck 1 back. Just before a
+                 dependent truck's route is built, release(truck, prerequisites) is called with the
+                 trucks it waited for, so it can move the truck's departure (see taskgraph.run_task_graph).
+
+    Parameters:
+    trucks : The list of truck objects, in truck order.
+    dependencies : A dictionary mapping a truck position (0-based) to the positions of the trucks it
+                   waits for. (default is None, every truck is independent)
+    release : A function taking a truck and the list of trucks it waited for. (default is None)
+    mode : The routing mode (see route_stops). (default is "greedy")
+    improve : If True, run the improvement stage on every route. (default is False)
+    time_budget : The maximum number of seconds the improvement stage may run for per route. (default is 0.05)
+    max_iterations : The maximum number of moves the improvement stage may apply per route. (default is 1000)
+    workers : The number of worker processes; None or 1 builds the routes one after another in this
+              process. (default is None)
+    dataset : The Dataset holding the packages and distances. (default is None, the default dataset)
+
+    Returns:
+    A list with the status logs of each truck, in truck order.
+
+    Raises:
+    ValueError : If the dependencies form a cycle or name an unknown truck.
+    """
+    dataset = dataset or get_dataset()
+    dependencies = dependencies or {}
+    hub = addresses("4001 South 700 East", dataset)
+    sources = (dataset.address_file, dataset.distance_file, dataset.package_file, dataset.cache, dataset.cache_dir,
+               dataset.shortest_paths, dataset.candidates)
+    parallel = workers is not None and workers > 1
+    stops = {}
+    status_logs = [None] * len(trucks)
+
+    def start(k):
+        truck = trucks[k]
+        if release is not None and dependencies.get(k):
+            release(truck, [trucks[j] for j in dependencies[k]])
+        stops[k] = load_stops(truck, dataset)
+        args = (stops[k], addresses(truck.current_location, dataset), hub, truck.time, truck.speed, mode, improve,
+                time_budget, max_iterations)
+        if parallel:
+            return _route_in_worker, (sources,) + args
+        return route_stops, args + (dataset,)
+
+    def finish(k, result):
+        order, trucks[k].miles_saved = result
+        status_logs[k] = drive_route(trucks[k], k + 1, stops.pop(k), order, improve, dataset)
+
+    if parallel:
+        # Make sure the snapshot exists before the workers try to memory-map it
+        dataset.distance_matrix
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(trucks))) as pool:
+            run_task_graph(list(range(len(trucks))), dependencies, start, finish, pool)
+    else:
+        run_task_graph(list(range(len(trucks))), dependencies, start, finish)
+    return status_logs
+
+
 '''
      ,------------------------------------------------------------------------------------------------,
      |                                     USER INTERFACE SECTION                                     |
@@ -539,183 +1856,177 @@ def format_datetime(dt):
         return "Invalid type"
 
 
-def print_headers_once(column_widths, parameters, printed_headers):
-    """
-    This function prints the headers for the package details table, but only once.
-    It checks if the headers have been printed before, and if not, it prints them and marks them as printed.
-
-    Time Complexity: O(n) - Constant time complexity.
+# The package details shown by the lookup, keyed by their option letter in the lookup menu
+DETAIL_TITLES = {
+    'a': 'Address',
+    'b': 'City',
+    'c': 'Zip Code',
+    'd': 'State',
+    'e': 'Deadline',
+    'f': 'Weight',
+    'g': 'Status',
+    'h': 'Departure Time',
+    'i': 'Delivery Time',
+    'j': 'Truck ID',
+    'k': 'All'
+}
 
-    Parameters:
-    column_widths : A dictionary mapping each parameter to its column width.
-    parameters : A list of parameters for which headers are to be printed.
-    printed_headers : A list used to track if headers have been printed. If the list is empty, headers are printed.
-    """
-    # Check if headers have been printed before
-    if not printed_headers:
-        # Define the headers with appropriate formatting
-        headers = {
-            'ID': f'\n\n\n\n {Colors.BOLD}{Colors.ORANGE}ID',
-            'Address': '\t\tAddress',
-            'City': '\tCity',
-            'State': '\tState',
-            'Zip Code': '\tZip Code',
-            'Deadline': '\tDeadline',
-            'Weight': '\tWeight',
-            'Status': '\t\tStatus',
-            'Truck ID': '\tTruck',
-            'Departure Time': '\tDeparted',
-            'Delivery Time': '\tDelivered'
-        }
-        # Create a row of headers with appropriate spacing
-        header_row = "".join(headers[param].ljust(column_widths[param]) for param in parameters)
-        # Print the row of headers
-        print(header_row)
-        # Print a line of dashes under the headers
-        print("—" * sum(column_widths.values()))
-        # Mark headers as printed
-        printed_headers.append(True)
+# The columns of the full package table, in order
+PACKAGE_PARAMETERS = ('ID', 'Address', 'City', 'State', 'Zip Code', 'Deadline', 'Weight', 'Status', 'Departure Time',
+                      'Delivery Time', 'Truck ID')
 
 
-def print_package_details(package, detail='all', printed_headers=None, detail_titles=None):
+def package_cells(color=True):
     """
-    This function prints the details of a package. The details include the package's ID, address, city, state, zip code,
-    deadline, weight, status, departure time, delivery time, and truck ID. The user can choose to view a specific detail
-    or all details. The details are printed in a tabular format with headers.
+    This function returns the cell functions of the package table. Each one turns a package into the
+    text of one column. The styled text that only depends on a status or a truck ID is built once here
+    instead of once per row.
 
-    Time Complexity: O(1) - O(n)
+    Time Complexity: O(1) - Constant time complexity.
 
     Parameters:
-    package : The package object whose details are to be printed.
-    detail : The specific detail to be printed. If 'all', all details are printed. (default is 'all')
-    printed_headers : A list used to track if headers have been printed. If the list is empty, headers are printed. (default is None)
-    detail_titles : A dictionary mapping detail codes to detail titles. (default is None)
+    color : True for the colored, tab-aligned cells of the interactive menu, False for plain text.
+            (default is True)
+
+    Returns:
+    dict : A cell function for each parameter in PACKAGE_PARAMETERS.
     """
-    # Check if printed_headers is None, if so, initialize it as an empty list
-    if printed_headers is None:
-        printed_headers = []
-    # Check if detail_titles is None, if so, initialize it with default values
-    if detail_titles is None:
-        detail_titles = {
-            'a': 'Address',
-            'b': 'City',
-            'c': 'Zip Code',
-            'd': 'State',
-            'e': 'Deadline',
-            'f': 'Weight',
-            'g': 'Status',
-            'h': 'Departure Time',
-            'i': 'Delivery Time',
-            'j': 'Truck ID',
-            'k': 'All'
+    if not color:
+        return {
+            'ID': lambda package: str(package.ID),
+            'Address': lambda package: package.street,
+            'City': lambda package: package.city,
+            'State': lambda package: package.state,
+            'Zip Code': lambda package: package.zip,
+            'Deadline': lambda package: package.deadline,
+            'Weight': lambda package: f"{package.weight}kg",
+            'Status': lambda package: package.status,
+            'Departure Time': lambda package: format_datetime(package.departureTime),
+            'Delivery Time': lambda package: format_datetime(package.deliveryTime),
+            'Truck ID': lambda package: str(package.truckID) if package.truckID is not None else "N/A",
         }
 
-    # Define package details with conditional styling for the 'Status'
     # If the status is "Delivered", it will be displayed in green, if it's "En route", it will be displayed in yellow
     status_styling = {
-        "At the hub": f"\t{Colors.BOLD}{Colors.LIGHT_RED}Central Hub{Colors.END}",
-        "Delivered": f"\t{Colors.BOLD}{Colors.LIGHT_GREEN}{package.status}{Colors.END}",
-        "En route": f"\t{Colors.BOLD}{Colors.LIGHT_YELLOW}{package.status}{Colors.END}",
+        "At the hub": f"\t\t{Colors.BOLD}{Colors.LIGHT_RED}Central Hub{Colors.END}",
+        "Delivered": f"\t\t{Colors.BOLD}{Colors.LIGHT_GREEN}Delivered{Colors.END}",
+        "En route": f"\t\t{Colors.BOLD}{Colors.LIGHT_YELLOW}En route{Colors.END}",
     }
-    status = status_styling.get(package.status, package.status)
-
-    # Define the details dictionary with the package attributes
-    # The values are formatted with appropriate padding and color for better readability
-    # If the status is "En route", color the delivery time detail yellow
+    # The delivery time takes the color of the status
     delivery_time_styling = {
-        "At the hub": f"\t\t\t{Colors.LIGHT_RED}{Colors.BOLD}{str(package.deliveryTime) if package.deliveryTime else 'N/A'}{Colors.END}",
-        "Delivered": f"\t\t\t{Colors.BOLD}{Colors.LIGHT_GREEN}{str(package.deliveryTime) if package.deliveryTime else 'N/A'}{Colors.END}",
-        "En route": f"\t\t\t{Colors.LIGHT_YELLOW}{Colors.BOLD}{str(package.deliveryTime) if package.deliveryTime else 'N/A'}{Colors.END}",
+        "At the hub": f"{Colors.LIGHT_RED}{Colors.BOLD}",
+        "Delivered": f"{Colors.BOLD}{Colors.LIGHT_GREEN}",
+        "En route": f"{Colors.LIGHT_YELLOW}{Colors.BOLD}",
     }
-    delivery_time = delivery_time_styling.get(package.status,
-                                              f"\t\t\t{Colors.BOLD}{str(package.deliveryTime) if package.deliveryTime else 'N/A'}{Colors.END}")
-
-    # Add an additional tab if the length of the delivery time string is less than or equal to time length and the status is either "En route" or "At the hub"
-    if len(str(package.deliveryTime)) <= len("0:00:00") and (
-            package.status == "En route" or package.status == "At the hub" or package.status == "Delivered"):
-        delivery_time = f"{delivery_time}\t"
-
-    # Define truck ID details with conditional styling
-    # If the truck ID is None, it will be displayed in red, otherwise, it will be displayed in different colors based on its value
+    # If the truck ID is None, it will be displayed in red, otherwise in the color of the truck
     truck_id_styling = {
-        1: f"\t\t\t{Colors.BOLD}{Colors.LIGHT_ORANGE}{str(package.truckID)}{Colors.END}",
-        2: f"\t\t\t{Colors.BOLD}{Colors.LIGHT_BLUE}{str(package.truckID)}{Colors.END}",
-        3: f"\t\t\t{Colors.BOLD}{Colors.LIGHT_PURPLE}{str(package.truckID)}{Colors.END}",
+        1: f"\t\t\t{Colors.BOLD}{Colors.LIGHT_ORANGE}1{Colors.END}",
+        2: f"\t\t\t{Colors.BOLD}{Colors.LIGHT_BLUE}2{Colors.END}",
+        3: f"\t\t\t{Colors.BOLD}{Colors.LIGHT_PURPLE}3{Colors.END}",
     }
-    truck_id = truck_id_styling.get(package.truckID, f"\t\t\t{Colors.BOLD}{Colors.LIGHT_RED}N/A{Colors.END}")
-
-    # Define the details dictionary with the package attributes
-    # The values are formatted with appropriate padding and color for better readability
-    details = {
-        'ID': f" {Colors.BOLD}{Colors.BRIGHT_WHITE}{str(package.ID)}{Colors.END}",
-        'Address': f"\t\t{package.street}",
-        'City': f"\t{package.city}",
-        'State': f"\t{package.state}",
-        'Zip Code': f"\t{package.zip}",
-        'Deadline': f"\t{package.deadline}",
-        'Weight': f"\t{str(package.weight)}kg",
-        'Status': f"\t{status}",
-        'Departure Time': f"\t\t{Colors.BOLD}{str(package.departureTime) if package.departureTime else 'N/A'}{Colors.END}",
+    no_truck = f"\t\t\t{Colors.BOLD}{Colors.LIGHT_RED}N/A{Colors.END}"
+
+    def delivery_time(package):
+        text = str(package.deliveryTime) if package.deliveryTime else 'N/A'
+        styling = delivery_time_styling.get(package.status)
+        if styling is None:
+            return f"\t\t\t{Colors.BOLD}{text}{Colors.END}"
+        # Add a tab after short times so the truck column stays aligned
+        if len(str(package.deliveryTime)) <= len("0:00:00"):
+            return f"\t\t\t{styling}{text}{Colors.END}\t"
+        return f"\t\t\t{styling}{text}{Colors.END}"
+
+    return {
+        'ID': lambda package: f" {Colors.BOLD}{Colors.BRIGHT_WHITE}{package.ID}{Colors.END}",
+        'Address': lambda package: f"\t\t{package.street}",
+        'City': lambda package: f"\t{package.city}",
+        'State': lambda package: f"\t{package.state}",
+        'Zip Code': lambda package: f"\t{package.zip}",
+        'Deadline': lambda package: f"\t{package.deadline}",
+        'Weight': lambda package: f"\t{package.weight}kg",
+        'Status': lambda package: status_styling.get(package.status, f"\t{package.status}"),
+        'Departure Time': lambda package: f"\t\t{Colors.BOLD}{str(package.departureTime) if package.departureTime else 'N/A'}{Colors.END}",
         'Delivery Time': delivery_time,
-        'Truck ID': truck_id
+        'Truck ID': lambda package: truck_id_styling.get(package.truckID, no_truck),
     }
 
-    # Define the column widths for each parameter
-    column_widths = {
-        'ID': 10,
-        'Address': 50,
-        'City': 20,
-        'State': 5,
-        'Zip Code': 10,
-        'Deadline': 10,
-        'Weight': 7,
-        'Status': 15,
-        'Departure Time': 20,
-        'Delivery Time': 20,
-        'Truck ID': 40
-    }
 
-    # Define the column widths for selected details
-    selected_details_column_widths = {
-        'ID': 10,
-        'Address': 35,
-        'City': 35,
-        'State': 35,
-        'Zip Code': 35,
-        'Deadline': 35,
-        'Weight': 35,
-        'Status': 35,
-        'Departure Time': 35,
-        'Delivery Time': 35,
-        'Truck ID': 35
-    }
+@functools.lru_cache(maxsize=None)
+def package_table_renderer(title='All', color=True):
+    """
+    This function compiles the layout of the package table into a TableRenderer. Layouts are cached, so
+    each one is only compiled once.
+
+    Time Complexity: O(1) - Constant time complexity.
 
-    # Define the parameter list
-    parameters = ['ID', 'Address', 'City', 'State', 'Zip Code', 'Deadline', 'Weight', 'Status', 'Departure Time',
-                  'Delivery Time', 'Truck ID']
+    Parameters:
+    title : The title of the detail to show next to the package ID, or 'All' for every detail.
+            (default is 'All')
+    color : True for the colored layout of the interactive menu, False for plain text. (default is True)
 
-    # If the detail is 'k', print all details
-    if detail == 'k':
-        print_headers_once(column_widths, parameters, printed_headers)  # Print headers if not yet printed
-        value_row = "".join(details[param].ljust(column_widths[param]) for param in parameters)
-        print(value_row)
-    else:
-        # If the detail is not 'k', print only the selected detail
-        if not printed_headers:
-            header_id = "ID".ljust(selected_details_column_widths['ID'])
-            header_detail = detail_titles[detail].ljust(selected_details_column_widths[detail_titles[detail]])
-            header = f"{Colors.BOLD}{Colors.ORANGE}\n\n\n{header_id}\t\t\t{header_detail}"
-            print(header)
-            print(f"{Colors.BOLD}{Colors.ORANGE}—" * (
-                    selected_details_column_widths['ID'] + selected_details_column_widths[detail_titles[detail]]))
-            printed_headers.append(True)
-
-        # Format the detail value and print it
-        detail_value = "{:<{}}".format(details[detail_titles[detail]],
-                                       selected_details_column_widths[detail_titles[detail]])
-        print(
-            f"{Colors.BOLD}{Colors.BRIGHT_WHITE}Package #{str(package.ID).ljust(selected_details_column_widths['ID'])}{Colors.END}"
-            f"{detail_value}")
+    Returns:
+    TableRenderer : The compiled layout.
+    """
+    cells = package_cells(color)
+    if color:
+        if title == 'All':
+            # Define the column widths and the headers for each parameter
+            column_widths = {'ID': 10, 'Address': 50, 'City': 20, 'State': 5, 'Zip Code': 10, 'Deadline': 10,
+                             'Weight': 7, 'Status': 15, 'Departure Time': 20, 'Delivery Time': 20, 'Truck ID': 40}
+            headers = {
+                'ID': f'\n\n\n\n {Colors.BOLD}{Colors.ORANGE}ID',
+                'Address': '\t\tAddress',
+                'City': '\tCity',
+                'State': '\tState',
+                'Zip Code': '\tZip Code',
+                'Deadline': '\tDeadline',
+                'Weight': '\tWeight',
+                'Status': '\t\tStatus',
+                'Truck ID': '\tTruck',
+                'Departure Time': '\tDeparted',
+                'Delivery Time': '\tDelivered'
+            }
+            return TableRenderer([(param, column_widths[param], cells[param]) for param in PACKAGE_PARAMETERS],
+                                 header="".join(headers[param].ljust(column_widths[param]) for param in PACKAGE_PARAMETERS),
+                                 rule="—" * sum(column_widths.values()))
+        # A single detail is shown next to the package number
+        return TableRenderer(
+            [('ID', 0, lambda package: f"{Colors.BOLD}{Colors.BRIGHT_WHITE}Package #{str(package.ID).ljust(10)}{Colors.END}"),
+             (title, 35, cells[title])],
+            header=f"{Colors.BOLD}{Colors.ORANGE}\n\n\n{'ID'.ljust(10)}\t\t\t{title.ljust(35)}",
+            rule=f"{Colors.BOLD}{Colors.ORANGE}—" * 45)
+
+    plain_widths = {'ID': 6, 'Address': 42, 'City': 18, 'State': 7, 'Zip Code': 10, 'Deadline': 10, 'Weight': 8,
+                    'Status': 12, 'Departure Time': 16, 'Delivery Time': 16, 'Truck ID': 8}
+    parameters = PACKAGE_PARAMETERS if title == 'All' else ('ID', title)
+    renderer = TableRenderer([(param, plain_widths[param], cells[param]) for param in parameters],
+                             rule="-" * sum(plain_widths[param] for param in parameters))
+    renderer.header = "\n" + renderer.header
+    return renderer
+
+
+def print_package_details(package, detail='k', printed_headers=None, detail_titles=None):
+    """
+    This function prints the details of a package. The details include the package's ID, address, city, state, zip code,
+    deadline, weight, status, departure time, delivery time, and truck ID. The user can choose to view a specific detail
+    or all details. The details are printed in a tabular format with headers, using the compiled layout of
+    package_table_renderer. Colors are only used when the output is a terminal.
+
+    Time Complexity: O(1)
+
+    Parameters:
+    package : The package object whose details are to be printed.
+    detail : The option letter of the detail to be printed, or 'k' for all details. (default is 'k')
+    printed_headers : A list used to track if headers have been printed. If the list is empty, headers are printed. (default is None)
+    detail_titles : A dictionary mapping detail codes to detail titles. (default is None, DETAIL_TITLES)
+    """
+    # Check if printed_headers is None, if so, initialize it as an empty list
+    if printed_headers is None:
+        printed_headers = []
+    title = (detail_titles or DETAIL_TITLES).get(detail, 'All')
+    package_table_renderer(title, supports_color()).write([package], header=not printed_headers)
+    if not printed_headers:
+        printed_headers.append(True)
 
 
 def get_user_input(prompt, validation_func, error_message):
@@ -740,7 +2051,7 @@ def get_user_input(prompt, validation_func, error_message):
             print(error_message)
 
 
-def lookup_package_status():
+def lookup_package_status(engine=None):
     """
     This function allows the user to look up the status of packages at a specific time.
     The user can choose to view the status of a specific package or all packages.
@@ -748,8 +2059,14 @@ def lookup_package_status():
     The details include the package's address, city, zip code, state, deadline, weight,
     status, departure time, delivery time, and truck ID.
 
+    The statuses come from a StatusEngine, which answers from read-only views, so looking up
+    a time never changes the packages themselves.
+
     Time Complexity: O(n)
 
+    Parameters:
+    engine : The StatusEngine to query. (default is None, built from the packages of the default dataset)
+
     Returns:
     None
     """
@@ -766,16 +2083,19 @@ def lookup_package_status():
     (h, m) = map(int, user_time_str.split(":"))
     time_change = datetime.timedelta(hours=h, minutes=m)
 
+    if engine is None:
+        engine = StatusEngine(get_dataset().packages.values(), get_dataset().constraints)
+
     # Ask the user to enter the package ID they wish to view, or press Enter to view all packages.
-    # The input is validated to ensure it is either empty or a valid package ID (1-40).
+    # The input is validated to ensure it is either empty or the ID of a known package.
     package_id_input = get_user_input(
         f"\n\n{Colors.BOLD}{Colors.ORANGE}Please enter the package ID you wish to view, "
         f"or press Enter to view all packages: {Colors.END}\n> ",
-        lambda x: x == '' or (x.isdigit() and 1 <= int(x) <= 40),
+        lambda x: x == '' or (x.isdigit() and int(x) in engine.packages),
         f"{Colors.BOLD}{Colors.LIGHT_RED}Invalid package ID. Please try again.{Colors.END}"
     )
-    # Convert the user input package ID to an integer, or get a list of all 40 package IDs if the user input is empty
-    package_ids = [int(package_id_input)] if package_id_input else range(1, 41)
+    # Convert the user input package ID to an integer, or get every package ID if the user input is empty
+    package_ids = [int(package_id_input)] if package_id_input else engine.package_ids
 
     # Ask the user to select the parameter they want to view.
     # The input is validated to ensure it is a valid option (a-j or k for all).
@@ -796,18 +2116,287 @@ def lookup_package_status():
         f"{Colors.BOLD}{Colors.LIGHT_RED}Invalid option. Please try again.{Colors.END}"
     )
 
-    # Initialize an empty list to track if headers have been printed
-    printed_headers = []
+    # Print the details of each package as they stand at the requested time, as one table in one write
+    renderer = package_table_renderer(DETAIL_TITLES[detail_input], supports_color())
+    renderer.write(engine.views_at(time_change, package_ids))
 
-    # For each package ID, get the package from the hash table, update its status, and print its details
-    for package_id in package_ids:
-        package = packageHash.search(package_id)
-        if package:
-            package.status_update(time_change)
-            print_package_details(package, detail=detail_input, printed_headers=printed_headers)
 
+def plan_truck_loads(departures, capacity=16, speed=18, dataset=None):
+    """
+    This function assigns every package in the hash table to a truck with the load planner, which
+    respects the truck capacity, the special notes, and the delivery deadlines (see planner.plan_loads).
+
+    Time Complexity: O(u^2 x t) - for u load units and t trucks.
+
+    Parameters:
+    departures : The departure time of each truck, as datetime.timedelta objects, in truck order.
+    capacity : The maximum number of packages on a truck. (default is 16)
+    speed : The speed of the trucks in miles per hour, used to check the deadlines. (default is 18)
+    dataset : The Dataset holding the packages and distances. (default is None, the default dataset)
+
+    Returns:
+    A list with one list of package IDs per truck, in truck order.
+    """
+    dataset = dataset or get_dataset()
+    packageHash = dataset.packages
+    packageConstraints = dataset.constraints
+    package_list = sorted(packageHash.values(), key=lambda package: package.ID)
+    # Plan with the address each package will finally be delivered to
+    streets = [package.street if packageConstraints.address_change(package.ID) is None
+               else packageConstraints.address_change(package.ID).street or package.street
+               for package in package_list]
+    address_ids = dict(zip((package.ID for package in package_list), addresses_many(streets, dataset)))
+    return plan_loads(package_list, address_ids, dataset.distance_matrix, addresses("4001 South 700 East", dataset),
+                      departures, packageConstraints, capacity=capacity, speed=speed)
+
+
+# The columns written by the query command, in order
+QUERY_FIELDS = ("time", "id", "status", "street", "city", "state", "zip", "deadline", "weight",
+                "departure_time", "delivery_time", "truck_id")
+
+
+def parse_query_time(text):
+    """
+    This function converts a time in 24-hour HH:MM format into a time after midnight.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Parameters:
+    text : The time, e.g. "14:30".
+
+    Returns:
+    datetime.timedelta : The time after midnight.
+
+    Raises:
+    ValueError : If the text is not a valid HH:MM time.
+    """
+    match = re.match(r'^([01]?\d|2[0-3]):([0-5]\d)$', text.strip())
+    if not match:
+        raise ValueError(f"Invalid time {text!r}, expected HH:MM")
+    return datetime.timedelta(hours=int(match.group(1)), minutes=int(match.group(2)))
+
+
+def parse_id_ranges(text):
+    """
+    This function expands a list of package IDs and ID ranges, e.g. "1-5,9,12-14".
+
+    Time Complexity: O(k) - for k IDs.
+
+    Parameters:
+    text : The comma-separated IDs and inclusive ranges.
+
+    Returns:
+    A list of package IDs, in the order given.
+
+    Raises:
+    ValueError : If a part is not an ID or a range.
+    """
+    package_ids = []
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        if not first.isdigit() or (dash and not last.isdigit()):
+            raise ValueError(f"Invalid package IDs {part!r}, expected an ID or a range such as 1-40")
+        package_ids.extend(range(int(first), int(last or first) + 1))
+    return package_ids
+
+
+def read_queries(source, default_ids=None):
+    """
+    This function reads status queries, one per line, from a file or standard input. Each line holds
+    a time and, optionally, the package IDs to report, e.g. "10:25 1-40". Blank lines and lines
+    starting with # are skipped.
+
+    Time Complexity: O(n) - for n lines.
+
+    Parameters:
+    source : The name of the query file, or "-" for standard input.
+    default_ids : The package IDs used by lines without IDs. (default is None, every package)
+
+    Yields:
+    A tuple (time, package_ids) for each query.
+
+    Raises:
+    ValueError : If a line has an invalid time or invalid IDs.
+    """
+    with open_csv(source) as queries:
+        for line_number, line in enumerate(queries, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            at, _, ids = line.partition(" ")
+            try:
+                yield parse_query_time(at), parse_id_ranges(ids) if ids.strip() else default_ids
+            except ValueError as error:
+                raise ValueError(f"Invalid query on line {line_number}: {error}") from None
+
+
+def write_query_results(engine, queries, output_format="csv", out=None):
+    """
+    This function answers status queries and writes one plain record per package, without colors or
+    pauses, so the output can be read by other programs.
+
+    Time Complexity: O(q x k) - for q queries of k packages each.
+
+    Parameters:
+    engine : The StatusEngine to query.
+    queries : An iterable of (time, package_ids) tuples; package_ids may be None for every package.
+    output_format : "csv" for a header row and comma-separated rows, or "jsonl" for one JSON object per
+                    line. (default is "csv")
+    out : The file to write to. (default is None, standard output)
+
+    Returns:
+    int : The number of records written.
+    """
+    out = out or sys.stdout
+    written = 0
+    if output_format == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(QUERY_FIELDS)
+    for time_at, package_ids in queries:
+        at = f"{time_at.seconds // 3600:02d}:{time_at.seconds // 60 % 60:02d}"
+        rows = [(at, package.ID, package.status, package.street, package.city, package.state, package.zip,
+                 package.deadline, package.weight,
+                 str(package.departureTime) if package.departureTime is not None else None,
+                 str(package.deliveryTime) if package.deliveryTime is not None else None,
+                 package.truckID)
+                for package in engine.views_at(time_at, package_ids)]
+        if output_format == "csv":
+            writer.writerows(rows)
+        else:
+            out.write("".join(json.dumps(dict(zip(QUERY_FIELDS, row))) + "\n" for row in rows))
+        written += len(rows)
+    return written
+
+
+def run_query(args):
+    """
+    This function runs the deliveries once and answers the status queries given on the command line.
+    Every query is read and checked before the deliveries run, so an invalid query or an unreadable
+    query file writes nothing to standard output.
+
+    Time Complexity: O(u^2 x t + n^2 + q x k)
+
+    Parameters:
+    args : The parsed arguments of the query command.
+
+    Returns:
+    int : The exit status, 0 on success and 2 for an invalid query or an unreadable query file.
+    """
+    try:
+        default_ids = parse_id_ranges(args.ids) if args.ids else None
+        queries = [(parse_query_time(at), default_ids) for at in args.at or []]
+        if args.queries:
+            queries.extend(read_queries(args.queries, default_ids))
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    except OSError as error:
+        print(f"Cannot read {args.queries}: {error.strerror or error}", file=sys.stderr)
+        return 2
+    status_engine = run_deliveries(workers=args.workers)[2]
+    write_query_results(status_engine, queries, args.format)
+    return 0
+
+
+def build_parser():
+    """
+    This function builds the command-line parser. Without a command the program starts the
+    interactive menu.
+
+    Returns:
+    argparse.ArgumentParser : The parser.
+    """
+    parser = argparse.ArgumentParser(description="WGUPS routing program.")
+    parser.add_argument("--shortest-paths", action="store_true",
+                        help="route on shortest-path distances instead of the direct distances in the file")
+    parser.add_argument("--candidates", type=int, metavar="K",
+                        help="restrict routing moves to each address's K nearest addresses")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="build the truck routes in N worker processes (default: one after another)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time the hot functions and print a summary to standard error when done")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="time the hot functions and write a Chrome trace (JSON) to FILE when done")
+    commands = parser.add_subparsers(dest="command")
+    query = commands.add_parser("query", help="print package statuses without the interactive menu",
+                                description="Run the deliveries once and print package statuses at the "
+                                            "given times.")
+    query.add_argument("--at", action="append", metavar="HH:MM",
+                       help="a time to report; may be given several times")
+    query.add_argument("--ids", metavar="IDS", help="package IDs and ranges, e.g. 1-40 or 1,4,9-12 "
+                                                    "(default: every package)")
+    query.add_argument("--queries", metavar="FILE",
+                       help='a file of "HH:MM [IDS]" lines to answer, or - for standard input')
+    query.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="the output format")
+    return parser
+
+
+# The functions timed by --profile and --trace, and the hash tables whose probe lengths are recorded
+PROFILED_FUNCTIONS = ("load_package_data", "addresses", "distance_between",
+                      "truck_deliver_packages", "route_stops", "drive_route", "run_deliveries",
+                      "lookup_package_status")
+PROFILED_TABLES = (ChainingHashTable, OpenAddressingHashTable)
+
+
+# The departure times of the three trucks in the standard plan.
+# Truck 1 leaves first thing in the morning, truck 2 leaves after the delayed packages arrive at 9:05 AM,
+# and truck 3 leaves at 11:00 AM once a driver is free, after package #9's address has been corrected.
+DEFAULT_DEPARTURES = (datetime.timedelta(hours=8), datetime.timedelta(hours=9, minutes=5),
+                      datetime.timedelta(hours=11))
+
+
+def run_deliveries(dataset=None, departures=DEFAULT_DEPARTURES, speed=18, mode="greedy", improve=False,
+                   capacity=16, workers=None):
+    """
+    This function plans the truck loads, drives every route, and indexes the results for status queries.
+    It prints nothing, so the interactive menu, the query command, and the scenario runner can all use it.
+
+    Time Complexity: O(u^2 x t + n^2) - for u load units, t trucks, and n stops.
+
+    Parameters:
+    dataset : The Dataset holding the packages and distances. (default is None, the default dataset)
+    departures : The departure time of each truck; one truck is used per departure. (default is
+                 DEFAULT_DEPARTURES)
+    speed : The speed of every truck in miles per hour. (default is 18)
+    mode : The routing mode passed to truck_deliver_packages. (default is "greedy")
+    improve : If True, run the route improvement stage on every route. (default is False)
+    capacity : The maximum number of packages on a truck. (default is 16)
+    workers : The number of processes building routes in parallel (see deliver_trucks). (default is None)
+
+    Returns:
+    A tuple (trucks, status_logs, status_engine) with the list of trucks, the list of status logs of
+    each truck, and the StatusEngine for the delivered packages.
+
+    Raises:
+    ValueError : If the packages cannot be loaded onto the trucks (see planner.plan_loads).
+    """
+    dataset = dataset or get_dataset()
+    # Initialize each truck with its departure time and let the load planner assign the packages
+    loads = plan_truck_loads(list(departures), capacity, speed, dataset=dataset)
+    trucks = [Trucks(speed, 0.0, "4001 South 700 East", depart_time, load)
+              for depart_time, load in zip(departures, loads)]
 
-def main():
+    # Deliver the packages of every truck. Truck 2's departure is settled once truck 1 is back,
+    # so its route is built after truck 1's while the other trucks' routes are built alongside.
+    def release(truck, prerequisites):
+        truck.depart_time = min(prerequisites[0].time, truck.time)
+
+    dependencies = {1: [0]} if len(trucks) > 1 else {}
+    status_logs = deliver_trucks(trucks, dependencies, release, mode, improve, workers=workers, dataset=dataset)
+
+    # Assign truck IDs after initializing trucks and before the delivery simulation
+    for truck_num, truck in enumerate(trucks, 1):
+        assign_packages_to_truck(truck, truck_num, dataset)
+
+    # Index the departure and delivery times once for the package status lookups
+    status_engine = StatusEngine(dataset.packages.values(), dataset.constraints)
+
+    return trucks, status_logs, status_engine
+
+
+def main(argv=None):
     """
      ,------------------------------------------------------------------------------------------------,
      |                                        MAIN FUNCTION                                           |
@@ -816,7 +2405,7 @@ def main():
 
     1. Prints the title of the program.
      a. Prints the hash table of packages before the delivery simulation. (optional)
-    2. Initializes three truck objects with specific attributes such as speed, miles, current location, departure time, and a list of package IDs.
+    2. Initializes three truck objects with specific attributes such as speed, miles, current location, and departure time, and loads them with the package IDs chosen by the load planner.
     3. Initializes status logs for each truck by calling the `truckDeliverPackages` function.
     4. Assigns truck IDs to each package loaded on the truck.
     5. Calculates the corrected total time in hours.
@@ -839,6 +2428,45 @@ def main():
     - Prints the selected details of the package(s) at the specified time.
 
     If the user chooses to quit, the program will exit.
+
+    When the query command is given (see build_parser), the statuses are printed without the menu instead.
+
+    With --profile or --trace, the functions in PROFILED_FUNCTIONS are timed for the whole run (see
+    profiling.Profiler) and the report is written when the program ends.
+
+    Parameters:
+    argv : The command-line arguments. (default is None, sys.argv[1:])
+    """
+    args = build_parser().parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        build_parser().error("--workers must be at least 1")
+    if args.shortest_paths or args.candidates:
+        load(shortest_paths=args.shortest_paths, candidates=args.candidates)
+    profiler = None
+    if args.profile or args.trace:
+        profiler = Profiler().instrument(sys.modules[__name__], PROFILED_FUNCTIONS, PROFILED_TABLES)
+    try:
+        if args.command == "query":
+            if not args.at and not args.queries:
+                build_parser().error("query needs --at or --queries")
+            return run_query(args)
+        return interactive_menu(args.workers)
+    finally:
+        if profiler is not None:
+            profiler.restore()
+            if args.profile:
+                profiler.print_summary(sys.stderr)
+            if args.trace:
+                profiler.write_chrome_trace(args.trace)
+
+
+def interactive_menu(workers=None):
+    """
+    This function prints the delivery metrics and runs the interactive menu until the user quits
+    (see main for the steps).
+
+    Parameters:
+    workers : The number of processes building routes in parallel (see deliver_trucks). (default is None)
     """
     # Print the program title and author information
     print(f"{Colors.END}{Colors.BOLD_ORANGE}\n\nWestern Governors University Parcel Service{Colors.END}")
@@ -849,38 +2477,12 @@ def main():
     '''
     Uncomment to print the hash table of packages before the delivery simulation
     '''
-    # packageHash.print_table()
-
-    # Initialize each truck and load the packages onto the trucks with their respective package IDs and departure times.
-    # Truck 1 is designated for early departure without any delayed packages. It focuses on packages with specific group requirements and those that can be delivered earliest in the morning.
-    truck1 = Trucks(18, 0.0, "4001 South 700 East", datetime.timedelta(hours=8),
-                    # Grouped packages: Ensuring packages #14, #15, #16, #19, #20, and #13 are together as required.
-                    # Package #37 is included for optimal route planning, and #38 and #36 are specific to Truck 2 but are adjusted here for illustrative purposes.
-                    [1, 29, 7, 30, 8, 34, 40, 14, 15, 16, 19, 20, 13, 37, 38, 36])
-
-    # Truck 2 departs after 9:05 AM to accommodate delayed packages. It carries packages with specific time constraints and those designated for Truck 2.
-    truck2 = Trucks(18, 0.0, "4001 South 700 East", datetime.timedelta(hours=9, minutes=5),
-                    # Delayed packages: #6, #28, #32, #33 are not available until 9:05 AM.
-                    # Truck-specific packages: #3, #18 as required.
-                    # Package #9: Included here to be delivered after the address correction at 10:20 AM.
-                    # Remaining packages fill the truck for efficiency and to ensure delivery within deadlines.
-                    [3, 18, 6, 28, 32, 33, 25, 12, 9, 22, 24, 11, 10, 5, 4, 21])
-
-    # Truck 3 is used for the remaining packages, ensuring no overloading and compliance with delivery deadlines. Includes the package needing address correction.
-    truck3 = Trucks(18, 0.0, "4001 South 700 East", datetime.timedelta(hours=11),
-                    # This truck fills with the remaining packages to ensure all packages are allocated and delivered.
-                    [2, 17, 23, 26, 27, 31, 35, 39])
-
-    # Initialize status logs for each truck
-    status_logs_truck1 = truck_deliver_packages(truck1, 1)
-    truck2.depart_time = min(truck1.time, truck2.time)
-    status_logs_truck2 = truck_deliver_packages(truck2, 2)
-    status_logs_truck3 = truck_deliver_packages(truck3, 3)
+    # get_dataset().packages.print_table()
 
-    # Assign truck IDs after initializing trucks and before the delivery simulation
-    assign_packages_to_truck(truck1, 1)
-    assign_packages_to_truck(truck2, 2)
-    assign_packages_to_truck(truck3, 3)
+    # Plan the loads, drive the routes, and index the results for the package status lookups
+    trucks, status_logs, status_engine = run_deliveries(workers=workers)
+    truck1, truck2, truck3 = trucks
+    status_logs_truck1, status_logs_truck2, status_logs_truck3 = status_logs
 
     # Calculate and display total metrics immediately after simulation
     total_time_corrected = sum(
@@ -938,11 +2540,11 @@ def main():
 
         # If the user chooses to look up package status
         elif user_choice.lower() == 'l':
-            lookup_package_status()
+            lookup_package_status(status_engine)
         else:
             # If the user enters an invalid choice, display an error message
             print(f"{Colors.BOLD}{Colors.LIGHT_RED}Invalid choice. Please try again.{Colors.END}")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                   ROUTE IMPROVEMENT MODULE                                     |
+    |      Local-search passes (2-opt and Or-opt) that shorten a route built by the greedy loop.     |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+"""
+
+import time
+
+# Moves must shorten the route by more than this many miles to be accepted, so that
+# floating point noise cannot make the search cycle between equal routes.
+EPSILON = 1e-9
+
+
+def route_length(matrix, start, route, end):
+    """
+    This function calculates the length of a route that leaves from one address, visits every
+    address in the route in order and finishes at another address.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    matrix : The DistanceMatrix that holds the distances between addresses.
+    start : The address index the route leaves from.
+    route : The list of address indices to visit, in order.
+    end : The address index the route finishes at.
+
+    Returns:
+    float : The length of the route in miles.
+    """
+    total = 0.0
+    previous = start
+    for address_id in route:
+        total += matrix.d(previous, address_id)
+        previous = address_id
+    return total + matrix.d(previous, end)
+
+
+def late_stops(matrix, start, route, depart_seconds, speed, deadlines):
+    """
+    This function finds the stops of a route that are reached after their deadline.
+
+    Time Complexity: O(n)
+
+    Parameters:
+    matrix : The DistanceMatrix that holds the distances between addresses.
+    start : The address index the route leaves from.
+    route : An iterable of (stop position, address index) pairs, in the order they are visited.
+    depart_seconds : The departure time in seconds after midnight.
+    speed : The speed of the truck in miles per hour.
+    deadlines : A list of deadlines in seconds after midnight, or None for stops without a deadline,
+                indexed by stop position.
+
+    Returns:
+    set : The stop positions that are reached after their deadline.
+    """
+    late = set()
+    miles = 0.0
+    previous = start
+    for stop, address_id in route:
+        miles += matrix.d(previous, address_id)
+        previous = address_id
+        deadline = deadlines[stop]
+        if deadline is not None and depart_seconds + miles / speed * 3600 > deadline:
+            late.add(stop)
+    return late
+
+
+def improve_route(matrix, start, address_ids, order, end=None, speed=18, depart_seconds=0.0, deadlines=None,
+                  time_budget=0.05, max_iterations=1000, neighbours=None):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                  ROUTE IMPROVEMENT FUNCTION                                    |
+    |                          Time Complexity: O(n^2), or O(n k) with lists, per pass               |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function improves a route with first-improvement local search. Each pass tries
+                 every 2-opt move (reversing a section of the route) and every Or-opt move (moving a
+                 section of one to three stops, optionally reversed, to another place in the route)
+                 and applies the first one that shortens the route. The search stops when a pass finds
+                 no shorter route, when max_iterations moves have been applied, or when time_budget
+                 seconds have passed.
+
+                 When deadlines are given, a shorter route is only accepted if every stop that is late
+                 on it was already late on the current route, so a move never breaks a deadline.
+
+                 When neighbour lists are given (see distances.nearest_neighbours), only moves that
+                 create an edge between an address and one of its k nearest addresses are tried: a
+                 2-opt move that joins a stop to one of its neighbours, and an Or-opt move that puts a
+                 section next to a neighbour of its first or last stop. Most shortening moves are of
+                 that kind, and each pass looks at O(n k) moves instead of O(n^2). The lists work best
+                 when they are built among the route's own addresses.
+
+    Parameters:
+    matrix : The DistanceMatrix that holds the distances between addresses.
+    start : The address index the route leaves from.
+    address_ids : The address index of each stop, indexed by stop position.
+    order : The list of stop positions in the order they are visited.
+    end : The address index the route finishes at. (default is start)
+    speed : The speed of the truck in miles per hour. (default is 18)
+    depart_seconds : The departure time in seconds after midnight. (default is 0.0)
+    deadlines : A list of deadlines in seconds after midnight, or None entries for stops without a
+                deadline, indexed by stop position. (default is None, no deadlines)
+    time_budget : The maximum number of seconds to search for. (default is 0.05)
+    max_iterations : The maximum number of moves to apply. (default is 1000)
+    neighbours : A dictionary mapping addresses to their neighbour lists. (default is None, try every move)
+
+    Returns:
+    A tuple (order, miles_saved) with the improved list of stop positions and the number of miles
+    it saves compared with the input order.
+    """
+    if end is None:
+        end = start
+    d = matrix.d
+    # Work on a list of address indices framed by the start and end, with the stop positions alongside
+    stops = list(order)
+    path = [start] + [address_ids[stop] for stop in stops] + [end]
+    baseline = route_length(matrix, start, path[1:-1], end)
+    check_deadlines = deadlines is not None and any(deadline is not None for deadline in deadlines)
+    late = late_stops(matrix, start, zip(stops, path[1:-1]), depart_seconds, speed, deadlines) \
+        if check_deadlines else set()
+    stop_at = time.perf_counter() + time_budget
+    iterations = 0
+    n = len(stops)
+
+    def accept(candidate_stops, candidate_path):
+        """
+        Applies a shorter candidate route unless it makes an on-time stop late.
+        """
+        nonlocal stops, path, late, iterations
+        if check_deadlines:
+            candidate_late = late_stops(matrix, start, zip(candidate_stops, candidate_path[1:-1]), depart_seconds,
+                                        speed, deadlines)
+            if not candidate_late <= late:
+                return False
+            late = candidate_late
+        stops, path = candidate_stops, candidate_path
+        iterations += 1
+        return True
+
+    improved = True
+    while improved and iterations < max_iterations and time.perf_counter() < stop_at:
+        improved = False
+
+        # The path position of every stop's address, for the neighbour list lookups
+        position = {address_id: p for p, address_id in enumerate(path[1:-1], 1)} if neighbours is not None else None
+
+        # 2-opt: reverse stops i..j (path positions i + 1 .. j + 1)
+        for i in range(n - 1):
+            a, b = path[i], path[i + 1]
+            if neighbours is None:
+                ends = range(i + 1, n)
+            else:
+                # Only the moves that join a to a neighbour c = path[j + 1], or b to a neighbour e = path[j + 2]
+                ends = {position[c] - 1 for c in neighbours.get(a, ()) if c in position and position[c] > i + 1}
+                ends.update(position[e] - 2 for e in neighbours.get(b, ()) if e in position and position[e] > i + 2)
+                ends = sorted(ends)
+            for j in ends:
+                c, e = path[j + 1], path[j + 2]
+                if d(a, c) + d(b, e) - d(a, b) - d(c, e) < -EPSILON:
+                    candidate_stops = stops[:i] + stops[i:j + 1][::-1] + stops[j + 1:]
+                    candidate_path = path[:i + 1] + path[i + 1:j + 2][::-1] + path[j + 2:]
+                    if accept(candidate_stops, candidate_path):
+                        improved = True
+                        break
+            if improved or time.perf_counter() >= stop_at:
+                break
+        if improved:
+            continue
+
+        # Or-opt: move a section of 1 to 3 stops (path positions i + 1 .. i + length) between two other stops
+        for length in (1, 2, 3):
+            for i in range(n - length + 1):
+                before, first = path[i], path[i + 1]
+                last, after = path[i + length], path[i + length + 1]
+                removed = d(before, first) + d(last, after) - d(before, after)
+                section_stops = stops[i:i + length]
+                section_path = path[i + 1:i + length + 1]
+                rest_stops = stops[:i] + stops[i + length:]
+                rest_path = path[:i + 1] + path[i + length + 1:]
+                if neighbours is None:
+                    gaps = range(len(rest_path) - 1)
+                else:
+                    # Only the gaps next to a neighbour x = rest_path[j] or y = rest_path[j + 1] of the section
+                    gaps = set()
+                    for c in set(neighbours.get(first, ())) | set(neighbours.get(last, ())):
+                        p = position.get(c)
+                        if p is None or i < p <= i + length:
+                            continue
+                        p = p if p <= i else p - length
+                        gaps.update(gap for gap in (p - 1, p) if 0 <= gap < len(rest_path) - 1)
+                    gaps = sorted(gaps)
+                for j in gaps:
+                    if j == i:
+                        continue
+                    x, y = rest_path[j], rest_path[j + 1]
+                    forward = d(x, first) + d(last, y) - d(x, y)
+                    backward = d(x, last) + d(first, y) - d(x, y)
+                    if min(forward, backward) - removed < -EPSILON:
+                        if forward <= backward:
+                            moved_stops, moved_path = section_stops, section_path
+                        else:
+                            moved_stops, moved_path = section_stops[::-1], section_path[::-1]
+                        candidate_stops = rest_stops[:j] + moved_stops + rest_stops[j:]
+                        candidate_path = rest_path[:j + 1] + moved_path + rest_path[j + 1:]
+                        if accept(candidate_stops, candidate_path):
+                            improved = True
+                            break
+                if improved or time.perf_counter() >= stop_at:
+                    break
+            if improved or time.perf_counter() >= stop_at:
+                break
+
+    return stops, baseline - route_length(matrix, start, path[1:-1], end)
@@ -0,0 +1,235 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                     SHORTEST PATHS MODULE                                      |
+    |      Closes the distance matrix under shortest paths, so every lookup is the best detour.      |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+
+The distance file gives one direct distance per pair of addresses, and some of them are longer than
+going through another address. The closure replaces every distance with the length of the shortest
+path, and keeps a successor matrix to tell which addresses that path passes through.
+
+Closure file layout (all integers are unsigned 64-bit, native byte order):
+
+    offset 0            magic           b"WGUPPATH"
+    offset 8            size            the number of addresses n
+    offset 16           distances       n * n float64 shortest-path distances in row-major order
+    offset 16 + 8n^2    successors      n * n int64 successors in row-major order
+"""
+
+import os
+import struct
+from array import array
+
+from distances import DistanceMatrix, np
+from snapshot import source_digest
+
+MAGIC = b"WGUPPATH"
+HEADER = struct.Struct("=8sQ")
+# A path must be shorter than the direct distance by more than this many miles to replace it, so that
+# floating point noise cannot turn an exact tie into a detour.
+EPSILON = 1e-9
+
+
+class ShortestPaths(DistanceMatrix):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                    SHORTEST PATHS CLASS                                        |
+    |                                   Time Complexity: O(1)                                        |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class is a DistanceMatrix whose distances are shortest-path distances, so it can
+                 be used anywhere the raw matrix is (d, row and column work the same way and are still
+                 O(1) per lookup). It also holds the successor matrix: successors[i][j] is the address
+                 that comes right after i on the shortest path from i to j, which is j itself when the
+                 direct distance is the shortest.
+
+    Methods:
+        1. __init__: Wraps existing blocks of distances and successors.
+        2. successor: Returns the next address on the shortest path between two addresses.
+        3. path: Returns every address on the shortest path between two addresses.
+
+    Time Complexity:
+        - __init__ / successor: O(1).
+        - path: O(p) for a path through p addresses.
+
+    Attributes:
+    size : The number of addresses in the matrix.
+    data : The n x n ndarray, or the flat array('d') of n * n floats, of shortest-path distances.
+    successors : The n x n int64 ndarray, or the flat array('q') of n * n successors.
+    """
+
+    def __init__(self, size, data, successors):
+        """
+        Constructs the matrix from existing blocks of distances and successors.
+
+        Parameters:
+        size : The number of addresses in the matrix.
+        data : The shortest-path distances, laid out as in DistanceMatrix.
+        successors : The successors, laid out the same way as the distances.
+        """
+        super().__init__(size, data)
+        self.successors = successors
+
+    def successor(self, i, j):
+        """
+        Returns the address that comes right after address i on the shortest path to address j.
+        """
+        if np is not None:
+            return int(self.successors.item(i, j))
+        return self.successors[i * self.size + j]
+
+    def path(self, i, j):
+        """
+        Returns the shortest path between two addresses.
+
+        Parameters:
+        i : The index of the first address.
+        j : The index of the last address.
+
+        Returns:
+        A list of address indices from i to j, both included.
+        """
+        path = [i]
+        while i != j:
+            i = self.successor(i, j)
+            path.append(i)
+        return path
+
+
+def shortest_path_closure(matrix):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                SHORTEST PATH CLOSURE FUNCTION                                  |
+    |                                  Time Complexity: O(n^3)                                       |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function runs Floyd–Warshall over a distance matrix. For every address k in
+                 turn, a path i -> k -> j replaces the best path from i to j found so far when it is
+                 shorter, and the successor of i towards j becomes its successor towards k. With NumPy
+                 each k is one vectorized pass over the whole n x n matrix; without it the same passes
+                 run over rows of floats.
+
+    Parameters:
+    matrix : The DistanceMatrix to close. It is not changed.
+
+    Returns:
+    ShortestPaths : The closed matrix with its successors.
+    """
+    size = matrix.size
+    if np is not None:
+        distances = np.array(matrix.data, dtype=np.float64).reshape(size, size)
+        successors = np.tile(np.arange(size, dtype=np.int64), (size, 1))
+        for k in range(size):
+            through_k = distances[:, k, None] + distances[None, k, :]
+            shorter = through_k < distances - EPSILON
+            if shorter.any():
+                distances = np.where(shorter, through_k, distances)
+                successors = np.where(shorter, successors[:, k, None], successors)
+        return ShortestPaths(size, distances, successors)
+
+    rows = [list(matrix.row(i)) for i in range(size)]
+    successor_rows = [list(range(size)) for _ in range(size)]
+    for k in range(size):
+        row_k = rows[k]
+        for i in range(size):
+            row_i, to_k = rows[i], rows[i][k]
+            successors_i, first_step = successor_rows[i], successor_rows[i][k]
+            for j in range(size):
+                through_k = to_k + row_k[j]
+                if through_k < row_i[j] - EPSILON:
+                    row_i[j] = through_k
+                    successors_i[j] = first_step
+    return ShortestPaths(size, array('d', (distance for row in rows for distance in row)),
+                         array('q', (successor for row in successor_rows for successor in row)))
+
+
+def write_closure(path, closure):
+    """
+    This function writes a closure file. Like a snapshot it is written under a temporary name and then
+    renamed, so a reader never sees a half-written file.
+
+    Time Complexity: O(n^2)
+
+    Parameters:
+    path : The path of the closure file.
+    closure : The ShortestPaths to store.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as closure_file:
+            closure_file.write(HEADER.pack(MAGIC, closure.size))
+            closure_file.write(closure.data.tobytes())
+            closure_file.write(closure.successors.tobytes())
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_closure(path):
+    """
+    This function loads a closure file.
+
+    Time Complexity: O(n^2)
+
+    Parameters:
+    path : The path of the closure file.
+
+    Returns:
+    ShortestPaths : The stored closure.
+
+    Raises:
+    ValueError : If the file is not a complete closure file.
+    """
+    with open(path, "rb") as closure_file:
+        content = closure_file.read()
+    if len(content) < HEADER.size:
+        raise ValueError(f"{path} is not a closure file")
+    magic, size = HEADER.unpack_from(content)
+    block = 8 * size * size
+    if magic != MAGIC or len(content) != HEADER.size + 2 * block:
+        raise ValueError(f"{path} is not a closure file")
+    distances = content[HEADER.size:HEADER.size + block]
+    successors = content[HEADER.size + block:]
+    if np is not None:
+        return ShortestPaths(size, np.frombuffer(distances, dtype=np.float64).reshape(size, size),
+                             np.frombuffer(successors, dtype=np.int64).reshape(size, size))
+    return ShortestPaths(size, array('d', distances), array('q', successors))
+
+
+def load_or_build_closure(cache_dir, filenames, matrix):
+    """
+    This function returns the shortest-path closure of a distance matrix, from the cache when the
+    source files have not changed (see snapshot.load_or_build, which caches the parsed files the same
+    way). The closure is stored as <digest>.paths, next to the snapshots, and older closures are
+    deleted when a new one is written.
+
+    Time Complexity: O(n^2) from the cache, O(n^3) otherwise.
+
+    Parameters:
+    cache_dir : The directory holding the closure files. It is created if needed.
+    filenames : The paths of the source files the matrix was parsed from, in a fixed order.
+    matrix : The DistanceMatrix to close when there is no cached closure.
+
+    Returns:
+    ShortestPaths : The closed matrix.
+    """
+    path = os.path.join(cache_dir, f"{source_digest(filenames)}.paths")
+    if os.path.exists(path):
+        try:
+            return read_closure(path)
+        except (ValueError, OSError):
+            # Fall through and replace the damaged file
+            pass
+    closure = shortest_path_closure(matrix)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_closure(path, closure)
+        for name in os.listdir(cache_dir):
+            if name.endswith(".paths") and name != os.path.basename(path):
+                os.remove(os.path.join(cache_dir, name))
+    except OSError:
+        pass
+    return closure
@@ -0,0 +1,158 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                      LOAD PLANNER MODULE                                       |
+    |       Assigns packages to trucks while respecting capacity, NOTES constraints and deadlines.   |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+"""
+
+import datetime
+
+
+class LoadUnit:
+    """
+    A class used to represent a group of packages that must be loaded onto the same truck.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Attributes:
+    packages : The list of package objects in the unit.
+    address_ids : The set of address indices the unit's packages are delivered to.
+    trucks : The set of truck positions (0-based) the unit may be loaded onto.
+    deadline : The earliest deadline of the unit's packages, or None.
+    """
+
+    def __init__(self, packages, address_ids, trucks, deadline):
+        """
+        Constructs all the necessary attributes for the load unit object.
+        """
+        self.packages = packages
+        self.address_ids = address_ids
+        self.trucks = trucks
+        self.deadline = deadline
+
+
+def plan_loads(packages, address_ids, matrix, hub, departures, constraints, capacity=16, speed=18):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                     LOAD PLANNER FUNCTION                                      |
+    |                                  Time Complexity: O(u^2 x t)                                   |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function assigns packages to trucks. It queries the compiled constraints of each
+                 package (see constraints.ConstraintTable) to find the trucks it may be loaded onto:
+                    - A truck restriction limits the package to that truck.
+                    - An earliest availability limits it to trucks leaving at or after that time.
+                    - An address change limits it to trucks leaving once the corrected address is known.
+                    - A deadline limits it to trucks that can reach the address directly by then.
+                 Packages in the same co-delivery group are merged into one load unit, and packages
+                 sharing an address are merged too whenever they have a truck in common.
+
+                 The units are then clustered onto the trucks. The most constrained units (fewest
+                 allowed trucks, then earliest deadline) are placed first, and each unit goes to the
+                 allowed truck with room for it whose current stops are closest to the unit's stops,
+                 so every truck's load stays geographically compact.
+
+    Parameters:
+    packages : The list of package objects to assign.
+    address_ids : A dictionary mapping each package ID to the address index it is delivered to.
+    matrix : The DistanceMatrix that holds the distances between addresses.
+    hub : The address index of the hub.
+    departures : The departure time of each truck, as datetime.timedelta objects, in truck order.
+    constraints : The ConstraintTable holding the compiled notes of the packages.
+    capacity : The maximum number of packages on a truck. (default is 16)
+    speed : The speed of the trucks in miles per hour. (default is 18)
+
+    Returns:
+    A list with one list of package IDs per truck, in truck order.
+
+    Raises:
+    ValueError : If a package cannot be loaded onto any truck.
+    """
+    all_trucks = set(range(len(departures)))
+    by_id = {package.ID: package for package in packages}
+
+    # Find the trucks each package may be loaded onto
+    allowed = {}
+    for package in packages:
+        trucks = set(all_trucks)
+        truck = constraints.truck_for(package.ID)
+        if truck is not None:
+            trucks &= {truck - 1}
+        available = constraints.available_at(package.ID)
+        if available is not None:
+            trucks &= {k for k in all_trucks if departures[k] >= available}
+        change = constraints.address_change(package.ID)
+        if change is not None:
+            trucks &= {k for k in all_trucks if change.time is not None and departures[k] >= change.time}
+        if package.deadline_time is not None:
+            hours = matrix.d(hub, address_ids[package.ID]) / speed
+            trucks &= {k for k in all_trucks if departures[k] + datetime.timedelta(hours=hours) <= package.deadline_time}
+        allowed[package.ID] = trucks
+
+    # Build the units required by the co-delivery groups, keyed by their smallest package ID
+    units = {}
+    for package in packages:
+        group = constraints.group_of(package.ID) or {package.ID}
+        ids = sorted(package_id for package_id in group if package_id in by_id)
+        if ids[0] not in units:
+            trucks = set(all_trucks)
+            for package_id in ids:
+                trucks &= allowed[package_id]
+            units[ids[0]] = (ids, trucks)
+
+    # Merge units that share an address when they still have a truck in common
+    owner = {}
+    for root in list(units):
+        ids, trucks = units[root]
+        unit_addresses = sorted({address_ids[package_id] for package_id in ids})
+        for address_id in unit_addresses:
+            other = owner.get(address_id)
+            if other is None or other == root:
+                owner[address_id] = root
+                continue
+            common = units[other][1] & trucks
+            if common and len(units[other][0]) + len(ids) <= capacity:
+                units[other] = (units[other][0] + ids, common)
+                del units[root]
+                # Hand the addresses this unit already claimed over to the unit it joined
+                for claimed in unit_addresses:
+                    if owner.get(claimed) in (None, root):
+                        owner[claimed] = other
+                break
+
+    # Turn the units into LoadUnit objects and check that each one fits somewhere
+    load_units = []
+    for ids, trucks in units.values():
+        unit_packages = [by_id[package_id] for package_id in ids]
+        deadlines = [package.deadline_time for package in unit_packages if package.deadline_time is not None]
+        if not trucks:
+            raise ValueError(f"No truck satisfies the constraints of packages {sorted(ids)}")
+        if len(ids) > capacity:
+            raise ValueError(f"Packages {sorted(ids)} must travel together but exceed the truck capacity")
+        load_units.append(LoadUnit(unit_packages, {address_ids[package_id] for package_id in ids}, trucks,
+                                   min(deadlines) if deadlines else None))
+
+    # Place the most constrained units first
+    latest = datetime.timedelta(days=1)
+    load_units.sort(key=lambda unit: (len(unit.trucks), unit.deadline or latest, -len(unit.packages)))
+
+    loads = [[] for _ in departures]
+    stops = [set() for _ in departures]
+    for unit in load_units:
+        best = None
+        for k in sorted(unit.trucks, key=lambda k: departures[k]):
+            if len(loads[k]) + len(unit.packages) > capacity:
+                continue
+            # Distance from the unit to the closest stop already on the truck, or to the hub for an empty truck
+            nearby = stops[k] or {hub}
+            cost = min(matrix.d(a, b) for a in unit.address_ids for b in nearby)
+            if best is None or cost < best[0]:
+                best = (cost, k)
+        if best is None:
+            raise ValueError(f"No truck has room for packages {sorted(package.ID for package in unit.packages)}")
+        loads[best[1]].extend(package.ID for package in unit.packages)
+        stops[best[1]] |= unit.address_ids
+
+    return loads
@@ -0,0 +1,279 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                        PROFILING MODULE                                        |
+    |      Opt-in timing of hot functions and hash table probes, with a summary and a trace file.    |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+
+A Profiler replaces the functions it is asked to watch with timed wrappers, and puts the originals
+back when it is done. Nothing is wrapped until instrument() is called, so a run without profiling
+executes exactly the code it would without this module.
+"""
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+from console import TableRenderer
+
+
+def percentile(sorted_values, fraction):
+    """
+    This function returns a percentile of a sorted list with the nearest-rank rule.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Parameters:
+    sorted_values : A non-empty list of numbers, in increasing order.
+    fraction : The percentile as a fraction, e.g. 0.99.
+    """
+    rank = max(1, math.ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+
+class Profiler:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                        PROFILER CLASS                                          |
+    |                                 Time Complexity: O(1) per call                                 |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class collects timings for a set of functions while it is installed:
+                    - every call of a watched function is timed with time.perf_counter_ns, and its
+                      duration is kept per function for the call counts, cumulative times and
+                      percentiles of the summary;
+                    - the first max_events calls are also kept as trace events, with their start
+                      time and thread, for the Chrome trace (chrome://tracing or Perfetto);
+                    - for hash table classes with a probe_length(key) method, every search also
+                      records how many entries it had to look at.
+                 The functions are replaced by name in the module (or class) that defines them, so
+                 calls from inside that module are timed too. Modules that imported a function by
+                 name before instrument() was called, and worker processes, keep the original.
+                 Nested calls are timed on their own and inside their caller, so cumulative times
+                 include the time of the watched functions they call.
+
+    Methods:
+        1. __init__: Creates an empty profiler.
+        2. instrument: Wraps functions of a module and the search method of hash table classes.
+        3. restore: Puts the original functions back.
+        4. summary: Returns the call statistics of every function.
+        5. probe_summary: Returns the probe length statistics of every hash table class.
+        6. print_summary: Prints both summaries as tables.
+        7. to_dict / write_json: Returns or writes the statistics as JSON.
+        8. chrome_trace / write_chrome_trace: Returns or writes the trace events in the Chrome trace format.
+
+    Time Complexity:
+        - a watched call: O(1) on top of the call itself.
+        - summary: O(c log c) for c recorded calls.
+    """
+
+    def __init__(self, max_events=1000000):
+        """
+        Constructs an empty profiler.
+
+        Parameters:
+        max_events : The maximum number of calls kept for the trace. Calls after that are still
+                     counted and timed. (default is 1000000)
+        """
+        self.max_events = max_events
+        self.durations = {}
+        self.events = []
+        self.probes = {}
+        self.patched = []
+        self.origin = time.perf_counter_ns()
+
+    def __enter__(self):
+        """
+        Returns the profiler, so an instrumented block can be written as `with profiler.instrument(...):`.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Restores the original functions when the block ends.
+        """
+        self.restore()
+
+    def wrap(self, name, function):
+        """
+        Returns a wrapper that times every call of a function under a name.
+        """
+        durations = self.durations.setdefault(name, [])
+        events = self.events
+        max_events = self.max_events
+        clock = time.perf_counter_ns
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                duration = clock() - start
+                durations.append(duration)
+                if len(events) < max_events:
+                    events.append((name, start, duration, threading.get_ident()))
+        return timed
+
+    def wrap_search(self, table_class):
+        """
+        Returns a search method that also records the probe length of every search.
+        """
+        search = table_class.search
+        lengths = self.probes.setdefault(table_class.__name__, {})
+
+        @functools.wraps(search)
+        def probed_search(table, key):
+            probes = table.probe_length(key)
+            lengths[probes] = lengths.get(probes, 0) + 1
+            return search(table, key)
+        return probed_search
+
+    def instrument(self, module, names, table_classes=()):
+        """
+        Installs the profiler.
+
+        Parameters:
+        module : The module defining the functions.
+        names : The names of the functions to time.
+        table_classes : Hash table classes whose searches record probe lengths. (default is none)
+
+        Returns:
+        Profiler : This profiler, which can be used as a context manager to restore the functions.
+
+        Raises:
+        ValueError : If a name is not a function of the module.
+        """
+        for name in names:
+            function = getattr(module, name, None)
+            if not callable(function):
+                raise ValueError(f"{module.__name__} has no function {name!r}")
+            self.patched.append((module, name, function))
+            setattr(module, name, self.wrap(name, function))
+        for table_class in table_classes:
+            self.patched.append((table_class, "search", table_class.search))
+            table_class.search = self.wrap_search(table_class)
+        return self
+
+    def restore(self):
+        """
+        Puts every original function back, so later calls cost nothing extra.
+        """
+        while self.patched:
+            owner, name, original = self.patched.pop()
+            setattr(owner, name, original)
+
+    def summary(self):
+        """
+        Returns the call statistics of every function that was called, slowest in total first.
+
+        Returns:
+        A list of dictionaries with the name, the number of calls, the total time in milliseconds, and
+        the mean, median, 90th and 99th percentile and maximum time of one call in microseconds.
+        """
+        rows = []
+        for name, durations in self.durations.items():
+            if not durations:
+                continue
+            ordered = sorted(durations)
+            total = sum(ordered)
+            rows.append({
+                'name': name,
+                'calls': len(ordered),
+                'total_ms': total / 1e6,
+                'mean_us': total / len(ordered) / 1e3,
+                'p50_us': percentile(ordered, 0.5) / 1e3,
+                'p90_us': percentile(ordered, 0.9) / 1e3,
+                'p99_us': percentile(ordered, 0.99) / 1e3,
+                'max_us': ordered[-1] / 1e3,
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def probe_summary(self):
+        """
+        Returns the probe length statistics of every hash table class that was searched.
+
+        Returns:
+        A list of dictionaries with the class name, the number of searches, the mean and maximum probe
+        length, and the number of searches for each probe length.
+        """
+        rows = []
+        for table, lengths in self.probes.items():
+            searches = sum(lengths.values())
+            if not searches:
+                continue
+            rows.append({
+                'table': table,
+                'searches': searches,
+                'mean_probes': sum(length * count for length, count in lengths.items()) / searches,
+                'max_probes': max(lengths),
+                'histogram': {str(length): lengths[length] for length in sorted(lengths)},
+            })
+        return rows
+
+    def print_summary(self, out=None):
+        """
+        Prints the call statistics and the probe length statistics as tables.
+
+        Parameters:
+        out : The file to write to. (default is None, standard output)
+        """
+        TableRenderer([
+            ('Function', 28, lambda row: row['name']),
+            ('Calls', 10, lambda row: str(row['calls'])),
+            ('Total ms', 12, lambda row: f"{row['total_ms']:.2f}"),
+            ('Mean µs', 12, lambda row: f"{row['mean_us']:.1f}"),
+            ('p50 µs', 12, lambda row: f"{row['p50_us']:.1f}"),
+            ('p90 µs', 12, lambda row: f"{row['p90_us']:.1f}"),
+            ('p99 µs', 12, lambda row: f"{row['p99_us']:.1f}"),
+            ('Max µs', 0, lambda row: f"{row['max_us']:.1f}"),
+        ], rule="—" * 110).write(self.summary(), out)
+        probes = self.probe_summary()
+        if probes:
+            TableRenderer([
+                ('Hash table', 28, lambda row: row['table']),
+                ('Searches', 10, lambda row: str(row['searches'])),
+                ('Mean probes', 14, lambda row: f"{row['mean_probes']:.2f}"),
+                ('Max probes', 0, lambda row: str(row['max_probes'])),
+            ], rule="—" * 64).write(probes, out)
+
+    def to_dict(self):
+        """
+        Returns the call and probe length statistics as a JSON-serializable dictionary.
+        """
+        return {'functions': self.summary(), 'hash_tables': self.probe_summary()}
+
+    def write_json(self, path):
+        """
+        Writes the call and probe length statistics to a JSON file.
+        """
+        with open(path, "w") as report:
+            json.dump(self.to_dict(), report, indent=2)
+
+    def chrome_trace(self):
+        """
+        Returns the recorded calls in the Chrome trace event format. Each call is a complete ("X")
+        event, timed in microseconds from the creation of the profiler; the statistics are included
+        under otherData.
+        """
+        pid = os.getpid()
+        origin = self.origin
+        return {
+            'traceEvents': [{'name': name, 'cat': "function", 'ph': "X", 'ts': (start - origin) / 1e3,
+                             'dur': duration / 1e3, 'pid': pid, 'tid': tid}
+                            for name, start, duration, tid in self.events],
+            'displayTimeUnit': "ms",
+            'otherData': self.to_dict(),
+        }
+
+    def write_chrome_trace(self, path):
+        """
+        Writes the recorded calls to a Chrome trace file (see chrome_trace).
+        """
+        with open(path, "w") as trace:
+            json.dump(self.chrome_trace(), trace)
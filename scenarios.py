@@ -0,0 +1,212 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                    SCENARIO RUNNER MODULE                                      |
+    |     Runs a grid of what-if delivery plans in parallel and ranks them by miles and lateness.    |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+
+Usage:
+    python scenarios.py                                            # the standard plan at 16, 18 and 20 mph
+    python scenarios.py --departures 8:00,9:05,11:00 8:00,9:05 --speeds 18 25
+    python scenarios.py --modes greedy deadline --improve both --capacities 16 20 --workers 8
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import itertools
+import os
+
+from console import TableRenderer
+from main import DATA_DIR, Dataset, parse_query_time, run_deliveries
+
+
+class Scenario:
+    """
+    A class used to represent one what-if delivery plan.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Attributes:
+    departures : The departure time of each truck, as a tuple of datetime.timedelta objects.
+    speed : The speed of every truck in miles per hour.
+    mode : The routing mode, "greedy" or "deadline".
+    improve : True to run the route improvement stage.
+    capacity : The maximum number of packages on a truck.
+    """
+    __slots__ = ("departures", "speed", "mode", "improve", "capacity")
+
+    def __init__(self, departures, speed=18, mode="greedy", improve=False, capacity=16):
+        """
+        Constructs all the necessary attributes for the scenario object.
+        """
+        self.departures = tuple(departures)
+        self.speed = speed
+        self.mode = mode
+        self.improve = improve
+        self.capacity = capacity
+
+    def __str__(self):
+        """
+        Returns a short description of the scenario.
+        """
+        times = ",".join(f"{int(t.total_seconds()) // 3600}:{int(t.total_seconds()) // 60 % 60:02d}"
+                         for t in self.departures)
+        strategy = self.mode + ("+improve" if self.improve else "")
+        return f"{len(self.departures)} trucks @ {times}, {self.speed:g} mph, {strategy}, cap {self.capacity}"
+
+
+def scenario_grid(departure_sets, speeds=(18,), modes=("greedy",), improve=(False,), capacities=(16,)):
+    """
+    This function builds every combination of the given parameters. The fleet size of a scenario is
+    the number of departure times in its departure set.
+
+    Time Complexity: O(d x s x m x i x c)
+
+    Parameters:
+    departure_sets : An iterable of departure time lists, one time per truck.
+    speeds : The truck speeds in miles per hour. (default is 18 mph only)
+    modes : The routing modes. (default is "greedy" only)
+    improve : The route improvement settings. (default is False only)
+    capacities : The truck capacities. (default is 16 only)
+
+    Returns:
+    A list of Scenario objects.
+    """
+    return [Scenario(departures, speed, mode, improved, capacity)
+            for departures, speed, mode, improved, capacity
+            in itertools.product(departure_sets, speeds, modes, improve, capacities)]
+
+
+def run_scenario(scenario, data_dir=None):
+    """
+    This function runs one scenario on its own copy of the dataset, so scenarios never see each other's
+    deliveries, and measures the result.
+
+    Time Complexity: O(u^2 x t + n^2)
+
+    Parameters:
+    scenario : The Scenario to run.
+    data_dir : The directory holding the CSV files. (default is None, the bundled data directory)
+
+    Returns:
+    dict : The scenario, the total miles, the last delivery time, the number of late packages, and the
+           error message if the packages could not be loaded (None otherwise).
+    """
+    dataset = Dataset(data_dir)
+    try:
+        trucks = run_deliveries(dataset, scenario.departures, scenario.speed, scenario.mode, scenario.improve,
+                                scenario.capacity)[0]
+    except ValueError as error:
+        return {'scenario': scenario, 'total_miles': None, 'last_delivery': None, 'missed_deadlines': None,
+                'error': str(error)}
+    packages = dataset.packages.values()
+    return {
+        'scenario': scenario,
+        'total_miles': sum(truck.miles for truck in trucks),
+        'last_delivery': max((package.deliveryTime for package in packages if package.deliveryTime is not None),
+                             default=None),
+        'missed_deadlines': sum(1 for package in packages
+                                if package.deadline_time is not None and package.deliveryTime is not None
+                                and package.deliveryTime > package.deadline_time),
+        'error': None,
+    }
+
+
+def rank(results):
+    """
+    This function sorts scenario results from best to worst: scenarios that could be planned first,
+    then fewest missed deadlines, fewest miles, and earliest last delivery.
+
+    Time Complexity: O(n log n)
+
+    Parameters:
+    results : A list of result dictionaries (see run_scenario).
+
+    Returns:
+    A new list of the results, best first.
+    """
+    latest = datetime.timedelta(days=1)
+    return sorted(results, key=lambda result: (result['error'] is not None, result['missed_deadlines'] or 0,
+                                               result['total_miles'] or 0.0, result['last_delivery'] or latest))
+
+
+def run_scenarios(scenarios, workers=None, data_dir=None):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                   SCENARIO RUNNER FUNCTION                                     |
+    |                                Time Complexity: O(k / w) runs                                  |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function runs every scenario in a pool of worker processes and ranks the results.
+                 Each scenario builds its own Dataset in the worker, so the runs are independent. The
+                 data files are loaded once before the pool starts, which writes the snapshot cache
+                 (see snapshot.load_or_build) that every worker then memory-maps instead of parsing
+                 the address and distance files again.
+
+    Parameters:
+    scenarios : A list of Scenario objects.
+    workers : The number of worker processes. (default is None, one per CPU)
+    data_dir : The directory holding the CSV files. (default is None, the bundled data directory)
+
+    Returns:
+    A list of result dictionaries (see run_scenario), best first (see rank).
+    """
+    Dataset(data_dir).distance_matrix
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(scenarios) // (4 * (workers or os.cpu_count() or 1)))
+        results = list(pool.map(run_scenario, scenarios, itertools.repeat(data_dir), chunksize=chunksize))
+    return rank(results)
+
+
+def format_last_delivery(result):
+    """
+    Returns the last delivery time of a scenario result to the second, or "-" if it could not be planned
+    or delivered nothing.
+    """
+    if result['last_delivery'] is None:
+        return "-"
+    return str(datetime.timedelta(seconds=int(result['last_delivery'].total_seconds())))
+
+
+def print_ranking(results, top=None):
+    """
+    This function prints ranked scenario results as a table.
+
+    Parameters:
+    results : A ranked list of result dictionaries (see rank).
+    top : The number of results to print. (default is None, every result)
+    """
+    columns = [
+        ('Rank', 6, lambda row: str(row[0])),
+        ('Scenario', 70, lambda row: str(row[1]['scenario'])),
+        ('Miles', 10, lambda row: f"{row[1]['total_miles']:.1f}" if row[1]['error'] is None else "-"),
+        ('Last delivery', 15, lambda row: format_last_delivery(row[1])),
+        ('Late', 6, lambda row: str(row[1]['missed_deadlines']) if row[1]['error'] is None else "-"),
+        ('Error', 0, lambda row: row[1]['error'] or ""),
+    ]
+    TableRenderer(columns, rule="—" * 107).write(enumerate(results[:top], 1))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a grid of delivery scenarios and rank them.")
+    parser.add_argument("--departures", nargs="+", default=["8:00,9:05,11:00"], metavar="TIMES",
+                        help="comma-separated departure times, one per truck; each set is one fleet")
+    parser.add_argument("--speeds", type=float, nargs="+", default=[16, 18, 20], help="truck speeds in mph")
+    parser.add_argument("--modes", nargs="+", choices=("greedy", "deadline"), default=["greedy"],
+                        help="routing modes")
+    parser.add_argument("--improve", choices=("off", "on", "both"), default="off",
+                        help="whether to run the route improvement stage")
+    parser.add_argument("--capacities", type=int, nargs="+", default=[16], help="truck capacities")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory holding the CSV files")
+    parser.add_argument("--top", type=int, help="print only the best scenarios")
+    args = parser.parse_args()
+    try:
+        departure_sets = [[parse_query_time(at) for at in times.split(",")] for times in args.departures]
+    except ValueError as error:
+        parser.error(str(error))
+    improve = {"off": (False,), "on": (True,), "both": (False, True)}[args.improve]
+    grid = scenario_grid(departure_sets, args.speeds, args.modes, improve, args.capacities)
+    print_ranking(run_scenarios(grid, args.workers, args.data_dir), args.top)
@@ -0,0 +1,337 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                  DISCRETE-EVENT SIMULATION MODULE                              |
+    |      Simulates the whole fleet in one global timeline: departures, arrivals, deliveries,       |
+    |               driver handoffs and package updates are processed in time order.                 |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+
+Usage:
+    python simulation.py                     # the standard day with two drivers
+    python simulation.py --drivers 3 --events
+"""
+
+import argparse
+import datetime
+import heapq
+import itertools
+
+from main import DEFAULT_DEPARTURES, Dataset, Trucks, addresses, format_datetime, plan_truck_loads, reroute
+
+# Event kinds. Events at the same time are processed in this order, so a package update is applied
+# before a truck loads it, and a driver handed off at a given time can take a truck leaving then.
+PACKAGE_UPDATE = "package update"
+RETURN = "return"
+HANDOFF = "driver handoff"
+ARRIVE = "arrive"
+DELIVER = "deliver"
+DEPART = "depart"
+PRIORITY = {PACKAGE_UPDATE: 0, RETURN: 1, HANDOFF: 2, ARRIVE: 3, DELIVER: 4, DEPART: 5}
+
+
+class EventQueue:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                      EVENT QUEUE CLASS                                         |
+    |                                 Time Complexity: O(E log E)                                    |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class is a discrete-event engine. Events are kept in one binary heap ordered
+                 by (time, kind priority, sequence number), so they come out in global time order,
+                 with ties broken by kind (see PRIORITY) and then by the order they were scheduled.
+                 Handlers registered for a kind are called with the event time and data, and may
+                 schedule more events. Each event costs one push and one pop, so E events take
+                 O(E log E) time.
+
+    Methods:
+        1. __init__: Creates an empty queue.
+        2. on: Registers the handler of an event kind.
+        3. schedule: Adds an event to the queue.
+        4. run: Processes events in time order until the queue is empty or a time limit is reached.
+
+    Attributes:
+    time : The time of the event being processed, or of the last one processed.
+    processed : The number of events processed.
+    log : The list of processed (time, kind, data) events, if record is set.
+    """
+
+    def __init__(self, record=False):
+        """
+        Constructs an empty queue.
+
+        Parameters:
+        record : True to keep every processed event in log. (default is False)
+        """
+        self.heap = []
+        self.sequence = itertools.count()
+        self.handlers = {}
+        self.time = None
+        self.processed = 0
+        self.log = [] if record else None
+
+    def __len__(self):
+        """
+        Returns the number of events waiting in the queue.
+        """
+        return len(self.heap)
+
+    def on(self, kind, handler):
+        """
+        Registers the function handler(time, *data) to be called for every event of a kind.
+        """
+        self.handlers[kind] = handler
+
+    def schedule(self, time, kind, *data):
+        """
+        Adds an event to the queue.
+
+        Parameters:
+        time : The time the event happens.
+        kind : The kind of the event, one of the keys of PRIORITY.
+        data : The values passed to the handler.
+
+        Raises:
+        ValueError : If the event would happen before the event being processed.
+        """
+        if self.time is not None and time < self.time:
+            raise ValueError(f"Cannot schedule a {kind} event at {time}, before the current time {self.time}")
+        heapq.heappush(self.heap, (time, PRIORITY[kind], next(self.sequence), kind, data))
+
+    def run(self, until=None):
+        """
+        Processes events in time order.
+
+        Parameters:
+        until : Stop before the first event later than this time. (default is None, run until the queue is empty)
+
+        Returns:
+        int : The number of events processed by this call.
+        """
+        heap = self.heap
+        handlers = self.handlers
+        processed = 0
+        while heap and (until is None or heap[0][0] <= until):
+            time, _, _, kind, data = heapq.heappop(heap)
+            self.time = time
+            if self.log is not None:
+                self.log.append((time, kind, data))
+            handler = handlers.get(kind)
+            if handler is not None:
+                handler(time, *data)
+            processed += 1
+        self.processed += processed
+        return processed
+
+
+class FleetSimulation:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                   FLEET SIMULATION CLASS                                       |
+    |                            Time Complexity: O(E log E + routing)                               |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class simulates one delivery day for the whole fleet on an EventQueue, instead
+                 of driving each truck to completion on its own:
+                    - depart: a truck leaves the hub once it is due and a driver is free. Its packages
+                      are grouped into stops with the addresses known at that moment, and its route is
+                      built (see main.reroute).
+                    - arrive / deliver: the truck reaches a stop and delivers each package there.
+                    - return / driver handoff: the truck is back at the hub and its driver becomes
+                      free for a truck that is still waiting.
+                    - package update: a package's address is corrected (see the constraint table's
+                      address changes). If the package is on a truck that has not delivered it yet,
+                      the part of that truck's route not driven yet is re-planned at its next stop.
+                 The packages of the dataset are updated as the day goes on, so after run() they hold
+                 the same departure, delivery and truck fields run_deliveries sets.
+
+    Attributes:
+    dataset : The Dataset being simulated. Its packages are updated by the simulation.
+    trucks : The list of truck objects, in truck order.
+    events : The EventQueue.
+    """
+
+    def __init__(self, dataset=None, departures=DEFAULT_DEPARTURES, drivers=2, speed=18, mode="greedy",
+                 improve=False, capacity=16, record=False):
+        """
+        Plans the loads and schedules the first events of the day.
+
+        Parameters:
+        dataset : The Dataset to simulate. (default is None, a new Dataset from the bundled files)
+        departures : The earliest departure time of each truck. (default is DEFAULT_DEPARTURES)
+        drivers : The number of drivers; a truck waits at the hub until one is free. (default is 2)
+        speed : The speed of every truck in miles per hour. (default is 18)
+        mode : The routing mode (see main.reroute). (default is "greedy")
+        improve : If True, run the route improvement stage on every route. (default is False)
+        capacity : The maximum number of packages on a truck. (default is 16)
+        record : True to keep every processed event in events.log. (default is False)
+        """
+        self.dataset = dataset or Dataset()
+        self.mode = mode
+        self.improve = improve
+        self.hub = addresses("4001 South 700 East", self.dataset)
+        self.free_drivers = drivers
+        # Trucks that are due to leave but have no driver, as a heap of (due time, truck number)
+        self.waiting = []
+
+        loads = plan_truck_loads(list(departures), capacity, speed, dataset=self.dataset)
+        self.trucks = [Trucks(speed, 0.0, "4001 South 700 East", depart_time, load)
+                       for depart_time, load in zip(departures, loads)]
+        # The route of each truck, the number of its stops reached so far, the packages changed since its
+        # last stop, and the truck carrying each package
+        self.routes = {}
+        self.reached = {}
+        self.changes = {}
+        self.carrier = {}
+
+        self.events = EventQueue(record)
+        self.events.on(PACKAGE_UPDATE, self.package_update)
+        self.events.on(RETURN, self.truck_return)
+        self.events.on(HANDOFF, self.driver_handoff)
+        self.events.on(ARRIVE, self.arrive)
+        self.events.on(DELIVER, self.deliver)
+        self.events.on(DEPART, self.depart)
+        for truck_num, truck in enumerate(self.trucks, 1):
+            self.events.schedule(truck.time, DEPART, truck_num)
+        for package_id, change in self.dataset.constraints.address_changes.items():
+            if change.time is not None:
+                self.events.schedule(change.time, PACKAGE_UPDATE, package_id, change.street, change.zip)
+
+    def run(self, until=None):
+        """
+        Runs the simulation.
+
+        Parameters:
+        until : Stop after the last event at or before this time. (default is None, run the whole day)
+
+        Returns:
+        FleetSimulation : This simulation, for chaining.
+        """
+        self.events.run(until)
+        return self
+
+    def depart(self, time, truck_num):
+        """
+        Sends a truck out if a driver is free, otherwise puts it in the waiting line.
+        """
+        if self.free_drivers == 0:
+            heapq.heappush(self.waiting, (time, truck_num))
+            return
+        self.free_drivers -= 1
+        truck = self.trucks[truck_num - 1]
+        truck.time = truck.depart_time = time
+        packageHash = self.dataset.packages
+        loaded = list(truck.packages)
+        truck.packages.clear()
+        for package_id in loaded:
+            package = packageHash.search(package_id)
+            package.departureTime = time
+            package.truckID = truck_num
+            self.carrier[package_id] = truck_num
+        # The whole load is new to an empty route
+        self.routes[truck_num] = reroute(truck, [], 0, loaded, self.mode, self.improve, dataset=self.dataset)
+        self.reached[truck_num] = 0
+        self.changes[truck_num] = []
+        self.next_leg(time, truck_num)
+
+    def next_leg(self, time, truck_num):
+        """
+        Schedules the truck's arrival at its next stop, or at the hub when every stop is done.
+        """
+        truck = self.trucks[truck_num - 1]
+        route = self.routes[truck_num]
+        reached = self.reached[truck_num]
+        matrix = self.dataset.distance_matrix
+        location = route[reached - 1].address_id if reached else self.hub
+        if reached < len(route):
+            miles = matrix.d(location, route[reached].address_id)
+            truck.miles += miles
+            self.events.schedule(time + datetime.timedelta(hours=miles / truck.speed), ARRIVE, truck_num)
+        else:
+            miles = matrix.d(location, self.hub)
+            truck.miles += miles
+            self.events.schedule(time + datetime.timedelta(hours=miles / truck.speed), RETURN, truck_num)
+
+    def arrive(self, time, truck_num):
+        """
+        Delivers the packages of the stop the truck has reached and sends it on to the next one. Packages
+        whose address was corrected after the route was planned are not delivered here but re-planned.
+        """
+        truck = self.trucks[truck_num - 1]
+        stop = self.routes[truck_num][self.reached[truck_num]]
+        self.reached[truck_num] += 1
+        truck.time = time
+        truck.current_location = stop.street
+        # Deliver only the packages still addressed here; one whose address was corrected on the way stays in
+        # the changes, and is taken off the stop so the re-plan below puts it on the rest of the route
+        stop.packages = [package for package in stop.packages if package.address_id == stop.address_id]
+        for package in stop.packages:
+            self.events.schedule(time, DELIVER, truck_num, package.ID)
+        # Re-plan the rest of the route if a package on it changed while the truck was driving
+        changes = self.changes[truck_num]
+        if changes:
+            self.routes[truck_num] = reroute(truck, self.routes[truck_num], self.reached[truck_num], changes,
+                                             self.mode, self.improve, dataset=self.dataset)
+            changes.clear()
+        self.next_leg(time, truck_num)
+
+    def deliver(self, time, truck_num, package_id):
+        """
+        Records the delivery of a package.
+        """
+        package = self.dataset.packages.search(package_id)
+        package.deliveryTime = time
+        self.trucks[truck_num - 1].packages.append(package_id)
+        del self.carrier[package_id]
+
+    def truck_return(self, time, truck_num):
+        """
+        Parks a truck at the hub and hands its driver over.
+        """
+        truck = self.trucks[truck_num - 1]
+        truck.time = time
+        truck.current_location = "4001 South 700 East"
+        self.events.schedule(time, HANDOFF, truck_num)
+
+    def driver_handoff(self, time, truck_num):
+        """
+        Frees the driver of a truck that has returned and gives them the truck that has waited longest.
+        """
+        self.free_drivers += 1
+        if self.waiting:
+            _, waiting_truck = heapq.heappop(self.waiting)
+            self.events.schedule(time, DEPART, waiting_truck)
+
+    def package_update(self, time, package_id, street, zip):
+        """
+        Applies an address correction to a package, and marks its truck for a new route if it is out on one.
+        A correction that arrives after the package was delivered is ignored.
+        """
+        package = self.dataset.packages.search(package_id)
+        if package is None or street is None or package.deliveryTime is not None:
+            return
+        package.street, package.zip = street, zip
+        package.address_id = addresses(street, self.dataset)
+        truck_num = self.carrier.get(package_id)
+        if truck_num is not None:
+            self.changes[truck_num].append(package_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate a delivery day on one global event queue.")
+    parser.add_argument("--drivers", type=int, default=2, help="number of drivers (default: 2)")
+    parser.add_argument("--speed", type=float, default=18, help="truck speed in mph (default: 18)")
+    parser.add_argument("--mode", choices=("greedy", "deadline"), default="greedy", help="routing mode")
+    parser.add_argument("--improve", action="store_true", help="run the route improvement stage")
+    parser.add_argument("--events", action="store_true", help="print every event")
+    args = parser.parse_args()
+    simulation = FleetSimulation(drivers=args.drivers, speed=args.speed, mode=args.mode, improve=args.improve,
+                                 record=args.events).run()
+    if args.events:
+        for time, kind, data in simulation.events.log:
+            print(f"{format_datetime(time):>16}  {kind:<15} {' '.join(str(value) for value in data)}")
+    for truck_num, truck in enumerate(simulation.trucks, 1):
+        print(f"Truck {truck_num}: departed {format_datetime(truck.depart_time)}, returned "
+              f"{format_datetime(truck.time)}, {truck.miles:.1f} miles, {len(truck.packages)} packages")
+    print(f"Total Distance: {sum(truck.miles for truck in simulation.trucks):.1f} miles")
+    print(f"Events processed: {simulation.events.processed}")
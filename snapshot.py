@@ -0,0 +1,167 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                    DATASET SNAPSHOT MODULE                                     |
+    |      Caches the parsed CSV data in one binary file that later runs load by memory-mapping.     |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+
+Snapshot layout (all integers are unsigned 64-bit, native byte order):
+
+    offset 0    magic           b"WGUPSNAP"
+    offset 8    size            the number of addresses n in the distance matrix
+    offset 16   tables_offset   where the marshalled address rows start
+    offset 24   tables_length   the number of bytes of marshalled rows
+    offset 32   matrix          n * n float64 distances in row-major order
+    tables_offset               marshal.dumps(address_rows)
+
+Each snapshot is named after the SHA-256 digest of the source CSV files, so editing any of them
+gives a new name and the old snapshot is never read again; it is deleted when the new one is written.
+The package file is not part of the snapshot: it can grow without bound, and it is streamed in
+batches instead (see main.load_package_data).
+"""
+
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+
+from distances import DistanceMatrix, np
+
+MAGIC = b"WGUPSNAP"
+# Bump the version whenever the layout changes, so old snapshots are ignored
+VERSION = 2
+HEADER = struct.Struct("=8sQQQ")
+# The number of bytes of a source file hashed at a time
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def source_digest(filenames):
+    """
+    This function hashes the contents of the source files. The snapshot version and the byte order
+    are hashed too, because the matrix is stored as native doubles.
+
+    Time Complexity: O(n) - where n is the total size of the files, in O(1) memory.
+
+    Parameters:
+    filenames : The paths of the source files, in a fixed order.
+
+    Returns:
+    str : The hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256(f"{VERSION}:{sys.byteorder}".encode())
+    for filename in filenames:
+        with open(filename, "rb") as source:
+            # Hash in blocks, so checking a large file never holds it in memory
+            for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        # Separate the files so moving bytes from one file to the next changes the digest
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def write_snapshot(path, matrix, address_rows):
+    """
+    This function writes a snapshot file. The file is written under a temporary name and then
+    renamed, so a reader never sees a half-written snapshot.
+
+    Time Complexity: O(n^2) - for n addresses.
+
+    Parameters:
+    path : The path of the snapshot file.
+    matrix : The DistanceMatrix to store.
+    address_rows : The rows of the address CSV file.
+    """
+    matrix_bytes = matrix.data.tobytes()
+    tables = marshal.dumps(address_rows)
+    tables_offset = HEADER.size + len(matrix_bytes)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as snapshot:
+            snapshot.write(HEADER.pack(MAGIC, len(matrix), tables_offset, len(tables)))
+            snapshot.write(matrix_bytes)
+            snapshot.write(tables)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_snapshot(path):
+    """
+    This function loads a snapshot file. The distance matrix is not copied: it is a read-only view
+    straight into the memory-mapped file, and only the pages that are used are read from disk.
+
+    Time Complexity: O(n) - for n address rows; the matrix is mapped in O(1).
+
+    Parameters:
+    path : The path of the snapshot file.
+
+    Returns:
+    A tuple (matrix, address_rows).
+
+    Raises:
+    ValueError : If the file is not a complete snapshot.
+    """
+    with open(path, "rb") as snapshot:
+        # The mapping keeps its own handle to the file, so the file itself can be closed here
+        mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < HEADER.size:
+        raise ValueError(f"{path} is not a snapshot")
+    magic, size, tables_offset, tables_length = HEADER.unpack_from(mapped)
+    if magic != MAGIC or tables_offset != HEADER.size + 8 * size * size \
+            or tables_offset + tables_length != len(mapped):
+        raise ValueError(f"{path} is not a snapshot")
+    address_rows = marshal.loads(mapped[tables_offset:])
+    if np is not None:
+        data = np.frombuffer(mapped, dtype=np.float64, count=size * size, offset=HEADER.size).reshape(size, size)
+    else:
+        data = memoryview(mapped)[HEADER.size:tables_offset].cast('d')
+    return DistanceMatrix(size, data), address_rows
+
+
+def load_or_build(cache_dir, filenames, build):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                   SNAPSHOT CACHE FUNCTION                                      |
+    |                               Time Complexity: O(n) - O(n^2)                                   |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function returns the parsed data for a set of source files, from the snapshot
+                 cache when it can:
+                    1. The source files are hashed (see source_digest).
+                    2. If the cache holds a snapshot with that digest, it is memory-mapped and returned.
+                    3. Otherwise build() parses the source files, the result is written as a new
+                       snapshot, and any older snapshots in the cache are deleted.
+                 A damaged snapshot is rebuilt, and a cache directory that cannot be written only
+                 costs the speed-up: the freshly parsed data is still returned.
+
+    Parameters:
+    cache_dir : The directory holding the snapshots. It is created if needed.
+    filenames : The paths of the source files, in a fixed order.
+    build : A function that parses the source files and returns (matrix, address_rows).
+
+    Returns:
+    A tuple (matrix, address_rows).
+    """
+    digest = source_digest(filenames)
+    path = os.path.join(cache_dir, f"{digest}.snap")
+    if os.path.exists(path):
+        try:
+            return read_snapshot(path)
+        except (ValueError, EOFError, TypeError, OSError):
+            # Fall through and replace the damaged snapshot
+            pass
+    matrix, address_rows = build()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_snapshot(path, matrix, address_rows)
+        # Remove the snapshots of older versions of the source files
+        for name in os.listdir(cache_dir):
+            if name.endswith(".snap") and name != os.path.basename(path):
+                os.remove(os.path.join(cache_dir, name))
+    except OSError:
+        pass
+    return matrix, address_rows
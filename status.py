@@ -0,0 +1,293 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                      STATUS ENGINE MODULE                                      |
+    |     Answers "where is every package at time T" from sorted timestamps, without mutating them.  |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+"""
+
+from bisect import bisect_right
+
+# The statuses a package can have, as shown by the package lookup
+AT_THE_HUB = "At the hub"
+EN_ROUTE = "En route"
+DELIVERED = "Delivered"
+
+
+class PackageStatus:
+    """
+    A read-only view of a package at a given time. It has the same attributes as the package it wraps,
+    except that status, street and zip code are the ones in effect at that time. The package itself is
+    never changed, so any number of views at different times can exist side by side.
+
+    Time Complexity: O(1) - Constant time complexity.
+
+    Attributes:
+    package : The package object the view wraps.
+    time : The time after midnight the view describes, as a datetime.timedelta.
+    status : The status of the package at that time.
+    street : The street address of the package at that time.
+    zip : The zip code of the package at that time.
+    """
+    __slots__ = ("package", "time", "status", "street", "zip")
+
+    def __init__(self, package, time, status, street, zip):
+        """
+        Constructs the view.
+        """
+        self.package = package
+        self.time = time
+        self.status = status
+        self.street = street
+        self.zip = zip
+
+    def __getattr__(self, name):
+        """
+        Returns every other attribute (ID, city, deadline, departureTime, ...) from the package.
+        """
+        return getattr(self.package, name)
+
+
+class IntervalIndex:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                    INTERVAL INDEX CLASS                                        |
+    |                                Time Complexity: O(log n + k)                                   |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class is a centered interval tree over half-open intervals [start, end). Each
+                 node keeps a center point and the intervals that contain it, sorted once by start and
+                 once by end; the intervals that end at or before the center go to the left subtree,
+                 and the ones that start after it to the right. A point below the center is contained
+                 by exactly the node's intervals that start at or before it, a prefix of the start
+                 order; a point at or above the center by the ones that end after it, a suffix of the
+                 end order. A query walks one path down the tree and reads one prefix or suffix per
+                 node, so it costs O(log n) plus the number of intervals it reports. The center is the
+                 lower median of the node's endpoints, so both subtrees are smaller than the node.
+
+    Methods:
+        1. __init__: Builds the tree over a list of intervals.
+        2. stab: Returns the IDs of the intervals containing a point.
+
+    Time Complexity:
+        - __init__: O(n log^2 n).
+        - stab: O(log n + k) for k intervals reported.
+
+    Attributes:
+    center : The point every interval of the node contains.
+    starts / start_ids : The starts and IDs of the node's intervals, by increasing start.
+    ends / end_ids : The ends and IDs of the node's intervals, by increasing end.
+    left / right : The subtrees of the intervals before and after the center, or None.
+    """
+    __slots__ = ("center", "starts", "start_ids", "ends", "end_ids", "left", "right")
+
+    def __init__(self, intervals):
+        """
+        Builds the tree.
+
+        Parameters:
+        intervals : A non-empty list of (start, end, ID) tuples with start < end.
+        """
+        endpoints = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = self.center = endpoints[(len(endpoints) - 1) // 2]
+        here, left, right = [], [], []
+        for interval in intervals:
+            if interval[1] <= center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        here.sort()
+        self.starts = [start for start, _, _ in here]
+        self.start_ids = [interval_id for _, _, interval_id in here]
+        here.sort(key=lambda interval: (interval[1], interval[2]))
+        self.ends = [end for _, end, _ in here]
+        self.end_ids = [interval_id for _, _, interval_id in here]
+        self.left = IntervalIndex(left) if left else None
+        self.right = IntervalIndex(right) if right else None
+
+    def stab(self, point):
+        """
+        Returns the IDs of the intervals that contain a point, in no particular order.
+
+        Parameters:
+        point : The point, comparable with the interval ends.
+        """
+        found = []
+        node = self
+        while node is not None:
+            if point < node.center:
+                # Every interval of the node ends after the center, so it holds the point if it has started
+                starts, count = node.starts, 0
+                while count < len(starts) and starts[count] <= point:
+                    count += 1
+                found.extend(node.start_ids[:count])
+                node = node.left
+            else:
+                # Every interval of the node starts by the center, so it holds the point if it has not ended
+                ends, first = node.ends, len(node.ends)
+                while first > 0 and ends[first - 1] > point:
+                    first -= 1
+                found.extend(node.end_ids[first:])
+                node = node.right
+        return found
+
+
+class StatusEngine:
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                     STATUS ENGINE CLASS                                        |
+    |                                 Time Complexity: O(log n) - O(n)                               |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This class answers status queries for a finished delivery plan. The departure and
+                 delivery time of every package are copied once into two sorted lists. A package has
+                 left the hub at time T if its departure time is at or before T, and has been
+                 delivered if its delivery time is at or before T, so one bisection per list gives
+                 how many packages are in each state at T. Packages without a delivery time are
+                 always at the hub. The packages en route at T are the ones whose interval from
+                 departure to delivery contains T, which an IntervalIndex lists directly.
+
+                 Queries never change the packages. Addresses are taken from the constraint table
+                 (see constraints.ConstraintTable.street_at), so a package whose address is corrected
+                 shows the address known at the time asked about.
+
+    Methods:
+        1. __init__: Builds the sorted timestamp lists.
+        2. status_of: Returns the status of one package at a time.
+        3. view: Returns a PackageStatus view of one package at a time.
+        4. views_at: Returns PackageStatus views of several packages at a time.
+        5. counts_at: Returns the number of packages in each status at a time.
+        6. ids_with_status: Returns the IDs of the packages in one status at a time.
+
+    Time Complexity:
+        - __init__: O(n log^2 n).
+        - status_of / view: O(1).
+        - views_at: O(k) for k packages.
+        - counts_at: O(log n).
+        - ids_with_status: O(log n + k) for the k packages returned.
+    """
+
+    def __init__(self, packages, constraints=None):
+        """
+        Constructs the engine from packages whose departure and delivery times are set.
+
+        Parameters:
+        packages : An iterable of package objects.
+        constraints : The ConstraintTable used to resolve address changes. (default is None, listed addresses)
+        """
+        self.constraints = constraints
+        self.packages = {package.ID: package for package in packages}
+        self.package_ids = sorted(self.packages)
+        scheduled = [package for package in self.packages.values()
+                     if package.departureTime is not None and package.deliveryTime is not None]
+        # Parallel lists of times and package IDs, sorted by time
+        by_departure = sorted(scheduled, key=lambda package: (package.departureTime, package.ID))
+        by_delivery = sorted(scheduled, key=lambda package: (package.deliveryTime, package.ID))
+        self.departures = [package.departureTime for package in by_departure]
+        self.departure_ids = [package.ID for package in by_departure]
+        self.deliveries = [package.deliveryTime for package in by_delivery]
+        self.delivery_ids = [package.ID for package in by_delivery]
+        # The time each package spends on a truck, for the packages en route at a given time
+        intervals = [(package.departureTime, package.deliveryTime, package.ID) for package in scheduled
+                     if package.departureTime < package.deliveryTime]
+        self.en_route = IntervalIndex(intervals) if intervals else None
+        # Packages that never leave the hub
+        self.unscheduled_ids = sorted(package.ID for package in self.packages.values()
+                                      if package.departureTime is None or package.deliveryTime is None)
+
+    def __len__(self):
+        """
+        Returns the number of packages the engine knows about.
+        """
+        return len(self.packages)
+
+    def status_of(self, package_id, time):
+        """
+        Returns the status of a package at a given time, or None if the package is unknown.
+
+        Parameters:
+        package_id : The ID of the package.
+        time : The time after midnight, as a datetime.timedelta.
+        """
+        package = self.packages.get(package_id)
+        if package is None:
+            return None
+        if package.deliveryTime is None or package.departureTime is None or time < package.departureTime:
+            return AT_THE_HUB
+        if time < package.deliveryTime:
+            return EN_ROUTE
+        return DELIVERED
+
+    def view(self, package_id, time):
+        """
+        Returns a read-only view of a package at a given time, or None if the package is unknown.
+
+        Parameters:
+        package_id : The ID of the package.
+        time : The time after midnight, as a datetime.timedelta.
+        """
+        package = self.packages.get(package_id)
+        if package is None:
+            return None
+        if self.constraints is not None:
+            street, zip = self.constraints.street_at(package, time)
+        else:
+            street, zip = package.street, package.zip
+        return PackageStatus(package, time, self.status_of(package_id, time), street, zip)
+
+    def views_at(self, time, package_ids=None):
+        """
+        Returns read-only views of several packages at a given time, skipping unknown IDs.
+
+        Parameters:
+        time : The time after midnight, as a datetime.timedelta.
+        package_ids : The IDs of the packages. (default is None, every package in ID order)
+        """
+        if package_ids is None:
+            package_ids = self.package_ids
+        view = self.view
+        return [status for status in (view(package_id, time) for package_id in package_ids) if status is not None]
+
+    def counts_at(self, time):
+        """
+        Returns the number of packages in each status at a given time.
+
+        Parameters:
+        time : The time after midnight, as a datetime.timedelta.
+
+        Returns:
+        dict : The number of packages at the hub, en route and delivered, keyed by status.
+        """
+        departed = bisect_right(self.departures, time)
+        delivered = bisect_right(self.deliveries, time)
+        return {
+            AT_THE_HUB: len(self.packages) - departed,
+            EN_ROUTE: departed - delivered,
+            DELIVERED: delivered,
+        }
+
+    def ids_with_status(self, status, time):
+        """
+        Returns the IDs of the packages in one status at a given time.
+
+        Parameters:
+        status : AT_THE_HUB, EN_ROUTE or DELIVERED.
+        time : The time after midnight, as a datetime.timedelta.
+
+        Returns:
+        A list of package IDs: in the order they are delivered, or leave the hub for the ones at the hub. The
+        ones en route are in no particular order.
+
+        Raises:
+        ValueError : If the status is not one of the three statuses.
+        """
+        if status == DELIVERED:
+            return self.delivery_ids[:bisect_right(self.deliveries, time)]
+        if status == EN_ROUTE:
+            return self.en_route.stab(time) if self.en_route is not None else []
+        if status == AT_THE_HUB:
+            return self.departure_ids[bisect_right(self.departures, time):] + self.unscheduled_ids
+        raise ValueError(f"Unknown status {status!r}")
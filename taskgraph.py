@@ -0,0 +1,114 @@
+"""
+    ,------------------------------------------------------------------------------------------------,
+    |                                                                                                |
+    |                                       TASK GRAPH MODULE                                        |
+    |       Runs jobs concurrently while respecting "job B may only start once job A is done".       |
+    |                                                                                                |
+    `------------------------------------------------------------------------------------------------'
+"""
+
+import concurrent.futures
+
+
+def topological_order(jobs, dependencies):
+    """
+    This function orders jobs so that every job comes after the jobs it depends on. Jobs that are
+    ready at the same time keep their input order.
+
+    Time Complexity: O(j + e) - for j jobs and e dependencies.
+
+    Parameters:
+    jobs : The list of jobs (any hashable values).
+    dependencies : A dictionary mapping a job to the jobs that must finish before it starts.
+
+    Returns:
+    A list of the jobs in a valid order.
+
+    Raises:
+    ValueError : If a dependency names an unknown job, or the dependencies form a cycle.
+    """
+    waiting = {job: set(dependencies.get(job, ())) for job in jobs}
+    dependents = {job: [] for job in jobs}
+    for job in dependencies:
+        if job not in waiting:
+            raise ValueError(f"Dependencies given for unknown job {job!r}")
+    for job, prerequisites in waiting.items():
+        for prerequisite in prerequisites:
+            if prerequisite not in dependents:
+                raise ValueError(f"Job {job!r} depends on unknown job {prerequisite!r}")
+            dependents[prerequisite].append(job)
+    ready = [job for job in jobs if not waiting[job]]
+    order = []
+    while ready:
+        job = ready.pop(0)
+        order.append(job)
+        for dependent in dependents[job]:
+            waiting[dependent].discard(job)
+            if not waiting[dependent]:
+                ready.append(dependent)
+    if len(order) != len(waiting):
+        raise ValueError(f"Jobs {sorted(set(waiting) - set(order), key=str)} depend on each other in a cycle")
+    return order
+
+
+def run_task_graph(jobs, dependencies, start, finish, executor=None):
+    """
+    ,------------------------------------------------------------------------------------------------,
+    |                                    TASK GRAPH FUNCTION                                         |
+    |                               Time Complexity: O(j + e) scheduling                             |
+    '------------------------------------------------------------------------------------------------'
+
+    Description: This function runs a set of jobs that may depend on each other. A job is started
+                 as soon as every job it depends on has finished, so independent jobs run side by
+                 side in the executor while dependent jobs wait.
+
+                 start(job) is called in the calling thread when the job becomes ready. It can adjust
+                 the job using the results of its prerequisites, and returns the function and the
+                 arguments to run in the executor. finish(job, result) is also called in the calling
+                 thread, once the function has returned, so both callbacks may update shared state
+                 without locks.
+
+                 Without an executor the jobs run one after another in topological order.
+
+    Parameters:
+    jobs : The list of jobs (any hashable values).
+    dependencies : A dictionary mapping a job to the jobs that must finish before it starts.
+    start : A function taking a job and returning a tuple (function, args).
+    finish : A function taking a job and the value its function returned.
+    executor : The concurrent.futures.Executor to run the jobs in. (default is None, run them inline)
+
+    Raises:
+    ValueError : If the dependencies are invalid (see topological_order).
+    Any exception raised by a job is raised again here.
+    """
+    order = topological_order(jobs, dependencies)
+    if executor is None:
+        for job in order:
+            function, args = start(job)
+            finish(job, function(*args))
+        return
+
+    waiting = {job: set(dependencies.get(job, ())) for job in jobs}
+    dependents = {job: [] for job in jobs}
+    for job, prerequisites in waiting.items():
+        for prerequisite in prerequisites:
+            dependents[prerequisite].append(job)
+    pending = {}
+
+    def submit(job):
+        function, args = start(job)
+        pending[executor.submit(function, *args)] = job
+
+    for job in order:
+        if not waiting[job]:
+            submit(job)
+    while pending:
+        done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            job = pending.pop(future)
+            finish(job, future.result())
+            # Start every job that was only waiting for this one
+            for dependent in dependents[job]:
+                waiting[dependent].discard(job)
+                if not waiting[dependent]:
+                    submit(dependent)
@@ -0,0 +1,37 @@
+"""
+Tests for the fleet simulation.
+"""
+
+import datetime
+import unittest
+
+from main import Dataset, addresses
+from simulation import PACKAGE_UPDATE, FleetSimulation
+
+
+class MidRouteCorrectionTest(unittest.TestCase):
+    """
+    A package whose address is corrected while its truck is driving to it is delivered at the new address.
+    """
+
+    def test_corrected_package_is_rerouted(self):
+        dataset = Dataset(cache=False)
+        simulation = FleetSimulation(dataset=dataset)
+        # Package 1 is delivered at 195 W Oakland Ave at 8:39 on the standard day
+        simulation.events.schedule(datetime.timedelta(hours=8, minutes=35), PACKAGE_UPDATE, 1, "300 State St",
+                                   "84103")
+        simulation.run()
+
+        package = dataset.packages.search(1)
+        corrected = addresses("300 State St", dataset)
+        self.assertEqual(package.street, "300 State St")
+        self.assertNotEqual(package.deliveryTime, datetime.timedelta(hours=8, minutes=39))
+        # The package is only on the stop at its corrected address
+        stops = [stop for stop in simulation.routes[1] if package in stop.packages]
+        self.assertEqual([stop.address_id for stop in stops], [corrected])
+        # Every other package was still delivered
+        self.assertTrue(all(dataset.packages.search(i).deliveryTime is not None for i in range(1, 41)))
+
+
+if __name__ == "__main__":
+    unittest.main()